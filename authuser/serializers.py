@@ -4,13 +4,12 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .models import User
 from master.models import Country, State, City
-from utils.models import OTP
+from utils.otp_service import issue_challenge, verify_challenge, OTPVerificationError
 from django.contrib.auth import authenticate
-from utils.email_utils import send_custom_email
-from utils.sms_otp_utils import send_otp_sms
+from utils.notifications import notify, notification_atomic, email_notification, sms_notification
 from django.conf import settings
-from django.utils import timezone
-import requests
+from utils.recaptcha import verify_recaptcha, RecaptchaUnavailable
+from utils.serializers import SparseFieldsetMixin
 from utils.utils import generate_otp 
 
 User = get_user_model()
@@ -21,7 +20,68 @@ USER_TYPE_CHOICES = (
     ('institute', 'Institute'),
 )
 
-class UserRegistrationSerializer(serializers.ModelSerializer):
+class RecaptchaValidationMixin:
+    """
+    Shared Google reCAPTCHA v3 validation for serializers that accept a
+    'google_recaptcha_v3_token'. Verification goes through utils.recaptcha,
+    which pools connections, enforces timeouts and caches verdicts.
+    """
+
+    def check_recaptcha(self, token):
+        """
+        Raises a ValidationError unless reCAPTCHA is disabled or the token is valid.
+        """
+        if settings.DISABLE_RECAPTCHA:
+            return
+        if not token:
+            raise serializers.ValidationError("Google reCAPTCHA token is required.")
+        if not self.validate_recaptcha(token):
+            raise serializers.ValidationError("Invalid reCAPTCHA. Please try again.")
+
+    def validate_recaptcha(self, token):
+        """
+        Validates Google reCAPTCHA v3 token.
+        """
+        try:
+            return verify_recaptcha(token)
+        except RecaptchaUnavailable:
+            raise serializers.ValidationError("reCAPTCHA validation failed.")
+
+class OTPVerificationMixin:
+    """
+    Verifies OTP codes through utils.otp_service, which counts failed
+    attempts, locks the account and consumes the challenge, and turns its
+    failures into ValidationErrors.
+    """
+    otp_labels = {'email_otp': 'Email', 'mobile_otp': 'Mobile'}
+
+    def verify_otp(self, user, invalid_message=None, **expected):
+        """
+        :param invalid_message: Message for a missing or non-matching challenge
+                                (default: names the wrong code and the attempts left)
+        :param expected: Challenge field -> submitted value
+        :return: The consumed OTPChallenge
+        """
+        try:
+            return verify_challenge(user, **expected)
+        except OTPVerificationError as e:
+            raise serializers.ValidationError(self.otp_error_message(e, invalid_message))
+
+    def otp_error_message(self, error, invalid_message):
+        if error.reason == 'missing':
+            return invalid_message or "No OTP found for this user."
+        if error.reason == 'verified':
+            return "OTP already verified."
+        if error.reason == 'expired':
+            return "OTP has expired."
+        if error.reason == 'locked':
+            return f"Account locked due to multiple failed verification attempts. Try again after {settings.LOGIN_LOCK_DURATION_HOURS} hours."
+        if invalid_message:
+            return invalid_message
+        label = self.otp_labels.get(error.field, 'OTP')
+        return f"Invalid {label} OTP. {error.remaining_attempts} attempts remaining."
+
+class UserRegistrationSerializer(RecaptchaValidationMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
     user_type = serializers.ChoiceField(choices=USER_TYPE_CHOICES)
     google_recaptcha_v3_token = serializers.CharField(write_only=True, required=False, allow_blank=True)
@@ -53,59 +113,42 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 
         # Validate reCAPTCHA if not disabled
         google_recaptcha_v3_token = attrs.get('google_recaptcha_v3_token', None)
-        if not settings.DISABLE_RECAPTCHA:
-            if not google_recaptcha_v3_token:
-                raise serializers.ValidationError("Google reCAPTCHA token is required.")
-            if not self.validate_recaptcha(google_recaptcha_v3_token):
-                raise serializers.ValidationError("Invalid reCAPTCHA. Please try again.")
+        self.check_recaptcha(google_recaptcha_v3_token)
 
         return attrs
 
-    def validate_recaptcha(self, token):
-        """
-        Validates Google reCAPTCHA v3 token.
-        """
-        secret_key = settings.GOOGLE_RECAPTCHA_SECRET_KEY
-        data = {
-            'secret': secret_key,
-            'response': token
-        }
-        try:
-            response = requests.post('https://www.google.com/recaptcha/api/siteverify', data=data)
-            result = response.json()
-            return result.get('success', False)
-        except Exception as e:
-            raise serializers.ValidationError("reCAPTCHA validation failed.")
-
     def create(self, validated_data):
         google_recaptcha_v3_token = validated_data.pop('google_recaptcha_v3_token', None)
-        user = User.objects.create_user(**validated_data)
-        self.create_otp(user)
+        with notification_atomic():
+            user = User.objects.create_user(**validated_data)
+            self.notification_channels = self.create_otp(user)
         return user
 
     def create_otp(self, user):
         """
-        Generates OTPs, saves them, and sends via email and SMS.
+        Generates OTPs, saves them, and queues them for email and SMS delivery.
+        Returns the per-channel delivery status from notify().
         """
         otp_email = generate_otp()
         otp_mobile = generate_otp()
-        expiry_time = timezone.now() + timezone.timedelta(minutes=settings.OTP_EXPIRY_MINUTES)
 
         # Save OTP
-        OTP.objects.create(user=user, email_otp=otp_email, mobile_otp=otp_mobile, expiry_time=expiry_time)
+        issue_challenge(user, resend=False, email_otp=otp_email, mobile_otp=otp_mobile)
 
-        # Send OTP via email
+        email = None
         if user.email:
             subject = "Your OTP Code"
             html_content = f"<p>Your OTP code is {otp_email}</p>"
-            send_custom_email(subject, html_content, [user.email])
+            email = email_notification(subject, html_content, user.email)
 
-        # Send OTP via SMS
+        sms = None
         if user.mobile and user.country:
             full_mobile = f"{user.country.code}{user.mobile}"
-            send_otp_sms(full_mobile, otp_mobile)
+            sms = sms_notification(full_mobile, otp_mobile)
+
+        return notify(email, sms)
 
-class ResendEmailOTPSerializer(serializers.Serializer):
+class ResendEmailOTPSerializer(RecaptchaValidationMixin, serializers.Serializer):
     email = serializers.EmailField()
     google_recaptcha_v3_token = serializers.CharField(
         write_only=True,
@@ -121,29 +164,12 @@ class ResendEmailOTPSerializer(serializers.Serializer):
             raise serializers.ValidationError("User with this email does not exist.")
 
         # Validate reCAPTCHA if not disabled
-        if not settings.DISABLE_RECAPTCHA:
-            if not google_recaptcha_v3_token:
-                raise serializers.ValidationError("Google reCAPTCHA token is required.")
-            if not self.validate_recaptcha(google_recaptcha_v3_token):
-                raise serializers.ValidationError("Invalid reCAPTCHA. Please try again.")
+        self.check_recaptcha(google_recaptcha_v3_token)
 
         return attrs
 
-    def validate_recaptcha(self, token):
-        secret_key = settings.GOOGLE_RECAPTCHA_SECRET_KEY
-        data = {
-            'secret': secret_key,
-            'response': token
-        }
-        try:
-            response = requests.post('https://www.google.com/recaptcha/api/siteverify', data=data)
-            result = response.json()
-            return result.get('success', False)
-        except Exception:
-            raise serializers.ValidationError("reCAPTCHA validation failed.")
-
 # Serializer for Resending Mobile OTP
-class ResendMobileOTPSerializer(serializers.Serializer):
+class ResendMobileOTPSerializer(RecaptchaValidationMixin, serializers.Serializer):
     mobile = serializers.CharField()
     google_recaptcha_v3_token = serializers.CharField(
         write_only=True,
@@ -159,28 +185,11 @@ class ResendMobileOTPSerializer(serializers.Serializer):
             raise serializers.ValidationError("User with this mobile does not exist.")
 
         # Validate reCAPTCHA if not disabled
-        if not settings.DISABLE_RECAPTCHA:
-            if not google_recaptcha_v3_token:
-                raise serializers.ValidationError("Google reCAPTCHA token is required.")
-            if not self.validate_recaptcha(google_recaptcha_v3_token):
-                raise serializers.ValidationError("Invalid reCAPTCHA. Please try again.")
+        self.check_recaptcha(google_recaptcha_v3_token)
 
         return attrs
 
-    def validate_recaptcha(self, token):
-        secret_key = settings.GOOGLE_RECAPTCHA_SECRET_KEY
-        data = {
-            'secret': secret_key,
-            'response': token
-        }
-        try:
-            response = requests.post('https://www.google.com/recaptcha/api/siteverify', data=data)
-            result = response.json()
-            return result.get('success', False)
-        except Exception:
-            raise serializers.ValidationError("reCAPTCHA validation failed.")
-        
-class UserLoginSerializer(serializers.Serializer):
+class UserLoginSerializer(RecaptchaValidationMixin, serializers.Serializer):
     identifier = serializers.CharField()
     password = serializers.CharField(write_only=True)
     google_recaptcha_v3_token = serializers.CharField(write_only=True, required=not settings.DISABLE_RECAPTCHA, allow_blank=True)
@@ -190,11 +199,7 @@ class UserLoginSerializer(serializers.Serializer):
         password = attrs.get('password')
         google_recaptcha_v3_token = attrs.get('google_recaptcha_v3_token', None)
 
-        if not settings.DISABLE_RECAPTCHA:
-            if not google_recaptcha_v3_token:
-                raise serializers.ValidationError("Google reCAPTCHA token is required.")
-            if not self.validate_recaptcha(google_recaptcha_v3_token):
-                raise serializers.ValidationError("Invalid reCAPTCHA. Please try again.")
+        self.check_recaptcha(google_recaptcha_v3_token)
 
         # Determine if identifier is email or mobile
         if '@' in identifier:
@@ -211,23 +216,7 @@ class UserLoginSerializer(serializers.Serializer):
         attrs['user'] = user
         return attrs
 
-    def validate_recaptcha(self, token):
-        """
-        Validates Google reCAPTCHA v3 token.
-        """
-        secret_key = settings.GOOGLE_RECAPTCHA_SECRET_KEY
-        data = {
-            'secret': secret_key,
-            'response': token
-        }
-        try:
-            response = requests.post('https://www.google.com/recaptcha/api/siteverify', data=data)
-            result = response.json()
-            return result.get('success', False)
-        except Exception as e:
-            raise serializers.ValidationError("reCAPTCHA validation failed.")
-
-class UserVerificationSerializer(serializers.Serializer):
+class UserVerificationSerializer(OTPVerificationMixin, RecaptchaValidationMixin, serializers.Serializer):
     email = serializers.EmailField(required=False, allow_null=True)
     mobile = serializers.CharField(required=False, allow_null=True)
     email_otp = serializers.CharField(max_length=6, required=False, allow_blank=True)
@@ -246,11 +235,7 @@ class UserVerificationSerializer(serializers.Serializer):
         google_recaptcha_v3_token = attrs.get('google_recaptcha_v3_token', None)
 
         # Validate reCAPTCHA if not disabled
-        if not settings.DISABLE_RECAPTCHA:
-            if not google_recaptcha_v3_token:
-                raise serializers.ValidationError("Google reCAPTCHA token is required.")
-            if not self.validate_recaptcha(google_recaptcha_v3_token):
-                raise serializers.ValidationError("Invalid reCAPTCHA. Please try again.")
+        self.check_recaptcha(google_recaptcha_v3_token)
 
         if not email and not mobile:
             raise serializers.ValidationError("Either email or mobile must be provided for verification.")
@@ -265,66 +250,19 @@ class UserVerificationSerializer(serializers.Serializer):
         except User.DoesNotExist:
             raise serializers.ValidationError("User with provided email or mobile does not exist.")
 
-        try:
-            # Fetch the latest OTP for the user
-            otp = OTP.objects.filter(user=user).latest('created_at')
-        except OTP.DoesNotExist:
-            raise serializers.ValidationError("No OTP found for this user.")
-
-        if otp.is_verified:
-            raise serializers.ValidationError("OTP already verified.")
-
-        if otp.expiry_time < timezone.now():
-            raise serializers.ValidationError("OTP has expired.")
-
-        if otp.attempts >= settings.OTP_MAX_ATTEMPTS:
-            # Lock the account
-            user.lock_until = timezone.now() + timezone.timedelta(hours=settings.LOGIN_LOCK_DURATION_HOURS)
-            user.is_active = False
-            user.save()
-            raise serializers.ValidationError("Account locked due to multiple failed verification attempts. Try again after 24 hours.")
-
-        # Validate Email OTP if provided
+        # Check the OTP of each identifier provided and consume the challenge
+        expected = {}
         if email:
-            if not otp.email_otp or otp.email_otp != email_otp:
-                otp.attempts += 1
-                otp.save()
-                remaining_attempts = settings.OTP_MAX_ATTEMPTS - otp.attempts
-                raise serializers.ValidationError(f"Invalid Email OTP. {remaining_attempts} attempts remaining.")
-
-        # Validate Mobile OTP if provided
+            expected['email_otp'] = email_otp
         if mobile:
-            if not otp.mobile_otp or otp.mobile_otp != mobile_otp:
-                otp.attempts += 1
-                otp.save()
-                remaining_attempts = settings.OTP_MAX_ATTEMPTS - otp.attempts
-                raise serializers.ValidationError(f"Invalid Mobile OTP. {remaining_attempts} attempts remaining.")
-
-        # If all provided OTPs are correct, mark as verified
-        otp.is_verified = True
-        otp.save()
+            expected['mobile_otp'] = mobile_otp
+        self.verify_otp(user, **expected)
 
         attrs['user'] = user
         return attrs
 
-    def validate_recaptcha(self, token):
-        """
-        Validates Google reCAPTCHA v3 token.
-        """
-        secret_key = settings.GOOGLE_RECAPTCHA_SECRET_KEY
-        data = {
-            'secret': secret_key,
-            'response': token
-        }
-        try:
-            response = requests.post('https://www.google.com/recaptcha/api/siteverify', data=data)
-            result = response.json()
-            return result.get('success', False)
-        except Exception:
-            raise serializers.ValidationError("reCAPTCHA validation failed.")
-
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     first_name = serializers.CharField(required=False, allow_blank=True)
     last_name = serializers.CharField(required=False, allow_blank=True)
     birth_date = serializers.DateField(required=False, allow_null=True)
@@ -458,7 +396,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
 
         return instance
 
-class UpdateEmailSerializer(serializers.Serializer):
+class UpdateEmailSerializer(RecaptchaValidationMixin, serializers.Serializer):
     new_email = serializers.EmailField()
     google_recaptcha_v3_token = serializers.CharField(
         write_only=True,
@@ -473,30 +411,10 @@ class UpdateEmailSerializer(serializers.Serializer):
 
     def validate(self, attrs):
         google_recaptcha_v3_token = attrs.get('google_recaptcha_v3_token', None)
-        if not settings.DISABLE_RECAPTCHA:
-            if not google_recaptcha_v3_token:
-                raise serializers.ValidationError("Google reCAPTCHA token is required.")
-            if not self.validate_recaptcha(google_recaptcha_v3_token):
-                raise serializers.ValidationError("Invalid reCAPTCHA. Please try again.")
+        self.check_recaptcha(google_recaptcha_v3_token)
         return attrs
 
-    def validate_recaptcha(self, token):
-        """
-        Validates Google reCAPTCHA v3 token.
-        """
-        secret_key = settings.GOOGLE_RECAPTCHA_SECRET_KEY
-        data = {
-            'secret': secret_key,
-            'response': token
-        }
-        try:
-            response = requests.post('https://www.google.com/recaptcha/api/siteverify', data=data)
-            result = response.json()
-            return result.get('success', False)
-        except Exception as e:
-            raise serializers.ValidationError("reCAPTCHA validation failed.")
-
-class UpdateEmailVerifySerializer(serializers.Serializer):
+class UpdateEmailVerifySerializer(OTPVerificationMixin, RecaptchaValidationMixin, serializers.Serializer):
     new_email = serializers.EmailField()
     email_otp = serializers.CharField(max_length=6)
     google_recaptcha_v3_token = serializers.CharField(
@@ -513,52 +431,16 @@ class UpdateEmailVerifySerializer(serializers.Serializer):
         if User.objects.filter(email=new_email).exists():
             raise serializers.ValidationError("Email already exists.")
 
-        if not settings.DISABLE_RECAPTCHA:
-            if not google_recaptcha_v3_token:
-                raise serializers.ValidationError("Google reCAPTCHA token is required.")
-            if not self.validate_recaptcha(google_recaptcha_v3_token):
-                raise serializers.ValidationError("Invalid reCAPTCHA. Please try again.")
+        self.check_recaptcha(google_recaptcha_v3_token)
 
-        try:
-            # Get the latest OTP record with new_email and new_email_otp
-            otp = OTP.objects.filter(
-                user=self.context['request'].user,
-                new_email=new_email,
-                new_email_otp=email_otp
-            ).latest('created_at')
-        except OTP.DoesNotExist:
-            raise serializers.ValidationError("Invalid OTP or email.")
-
-        if otp.expiry_time < timezone.now():
-            raise serializers.ValidationError("OTP has expired.")
-
-        if otp.attempts >= settings.OTP_MAX_ATTEMPTS:
-            user = self.context['request'].user
-            user.lock_until = timezone.now() + timezone.timedelta(hours=settings.LOGIN_LOCK_DURATION_HOURS)
-            user.is_active = False
-            user.save()
-            raise serializers.ValidationError("Account locked due to multiple failed verification attempts. Try again after 24 hours.")
-
-        attrs['otp'] = otp
+        # The active OTP challenge must be for this new email and code
+        self.verify_otp(
+            self.context['request'].user, invalid_message="Invalid OTP or email.",
+            new_email=new_email, new_email_otp=email_otp
+        )
         return attrs
 
-    def validate_recaptcha(self, token):
-        """
-        Validates Google reCAPTCHA v3 token.
-        """
-        secret_key = settings.GOOGLE_RECAPTCHA_SECRET_KEY
-        data = {
-            'secret': secret_key,
-            'response': token
-        }
-        try:
-            response = requests.post('https://www.google.com/recaptcha/api/siteverify', data=data)
-            result = response.json()
-            return result.get('success', False)
-        except Exception:
-            raise serializers.ValidationError("reCAPTCHA validation failed.")
-
-class UpdateMobileSerializer(serializers.Serializer):
+class UpdateMobileSerializer(RecaptchaValidationMixin, serializers.Serializer):
     new_mobile = serializers.CharField(max_length=15)
     country = serializers.IntegerField()
     google_recaptcha_v3_token = serializers.CharField(
@@ -579,30 +461,10 @@ class UpdateMobileSerializer(serializers.Serializer):
 
     def validate(self, attrs):
         google_recaptcha_v3_token = attrs.get('google_recaptcha_v3_token', None)
-        if not settings.DISABLE_RECAPTCHA:
-            if not google_recaptcha_v3_token:
-                raise serializers.ValidationError("Google reCAPTCHA token is required.")
-            if not self.validate_recaptcha(google_recaptcha_v3_token):
-                raise serializers.ValidationError("Invalid reCAPTCHA. Please try again.")
+        self.check_recaptcha(google_recaptcha_v3_token)
         return attrs
 
-    def validate_recaptcha(self, token):
-        """
-        Validates Google reCAPTCHA v3 token.
-        """
-        secret_key = settings.GOOGLE_RECAPTCHA_SECRET_KEY
-        data = {
-            'secret': secret_key,
-            'response': token
-        }
-        try:
-            response = requests.post('https://www.google.com/recaptcha/api/siteverify', data=data)
-            result = response.json()
-            return result.get('success', False)
-        except Exception:
-            raise serializers.ValidationError("reCAPTCHA validation failed.")
-
-class UpdateMobileVerifySerializer(serializers.Serializer):
+class UpdateMobileVerifySerializer(OTPVerificationMixin, RecaptchaValidationMixin, serializers.Serializer):
     new_mobile = serializers.CharField(max_length=15)
     country = serializers.IntegerField()
     mobile_otp = serializers.CharField(max_length=6)
@@ -624,51 +486,15 @@ class UpdateMobileVerifySerializer(serializers.Serializer):
         if not Country.objects.filter(id=country).exists():
             raise serializers.ValidationError("Country does not exist.")
 
-        if not settings.DISABLE_RECAPTCHA:
-            if not google_recaptcha_v3_token:
-                raise serializers.ValidationError("Google reCAPTCHA token is required.")
-            if not self.validate_recaptcha(google_recaptcha_v3_token):
-                raise serializers.ValidationError("Invalid reCAPTCHA. Please try again.")
+        self.check_recaptcha(google_recaptcha_v3_token)
 
-        try:
-            # Get the latest OTP record with new_mobile and new_mobile_otp
-            otp = OTP.objects.filter(
-                user=self.context['request'].user,
-                new_mobile=new_mobile,
-                new_mobile_otp=mobile_otp
-            ).latest('created_at')
-        except OTP.DoesNotExist:
-            raise serializers.ValidationError("Invalid OTP or mobile number.")
-
-        if otp.expiry_time < timezone.now():
-            raise serializers.ValidationError("OTP has expired.")
-
-        if otp.attempts >= settings.OTP_MAX_ATTEMPTS:
-            user = self.context['request'].user
-            user.lock_until = timezone.now() + timezone.timedelta(hours=settings.LOGIN_LOCK_DURATION_HOURS)
-            user.is_active = False
-            user.save()
-            raise serializers.ValidationError("Account locked due to multiple failed verification attempts. Try again after 24 hours.")
-
-        attrs['otp'] = otp
+        # The active OTP challenge must be for this new mobile and code
+        self.verify_otp(
+            self.context['request'].user, invalid_message="Invalid OTP or mobile number.",
+            new_mobile=new_mobile, new_mobile_otp=mobile_otp
+        )
         return attrs
 
-    def validate_recaptcha(self, token):
-        """
-        Validates Google reCAPTCHA v3 token.
-        """
-        secret_key = settings.GOOGLE_RECAPTCHA_SECRET_KEY
-        data = {
-            'secret': secret_key,
-            'response': token
-        }
-        try:
-            response = requests.post('https://www.google.com/recaptcha/api/siteverify', data=data)
-            result = response.json()
-            return result.get('success', False)
-        except Exception:
-            raise serializers.ValidationError("reCAPTCHA validation failed.")
-        
 class ChangePasswordSerializer(serializers.Serializer):
     old_password = serializers.CharField(
         required=True, 
@@ -693,7 +519,7 @@ class ChangePasswordSerializer(serializers.Serializer):
         # Add additional password validations if necessary (e.g., complexity)
         return value
     
-class ForgotPasswordSerializer(serializers.Serializer):
+class ForgotPasswordSerializer(RecaptchaValidationMixin, serializers.Serializer):
     email = serializers.EmailField(required=True)
     mobile = serializers.CharField(max_length=15, required=True)
     google_recaptcha_v3_token = serializers.CharField(
@@ -708,11 +534,7 @@ class ForgotPasswordSerializer(serializers.Serializer):
         google_recaptcha_v3_token = attrs.get('google_recaptcha_v3_token', None)
 
         # Validate reCAPTCHA if enabled
-        if not settings.DISABLE_RECAPTCHA:
-            if not google_recaptcha_v3_token:
-                raise serializers.ValidationError("Google reCAPTCHA token is required.")
-            if not self.validate_recaptcha(google_recaptcha_v3_token):
-                raise serializers.ValidationError("Invalid reCAPTCHA. Please try again.")
+        self.check_recaptcha(google_recaptcha_v3_token)
 
         # Check if the combination of email and mobile exists
         try:
@@ -723,23 +545,7 @@ class ForgotPasswordSerializer(serializers.Serializer):
         attrs['user'] = user
         return attrs
 
-    def validate_recaptcha(self, token):
-        """
-        Validates Google reCAPTCHA v3 token.
-        """
-        secret_key = settings.GOOGLE_RECAPTCHA_SECRET_KEY
-        data = {
-            'secret': secret_key,
-            'response': token
-        }
-        try:
-            response = requests.post('https://www.google.com/recaptcha/api/siteverify', data=data)
-            result = response.json()
-            return result.get('success', False)
-        except Exception:
-            raise serializers.ValidationError("reCAPTCHA validation failed.")
-
-class ResetNewPasswordSerializer(serializers.Serializer):
+class ResetNewPasswordSerializer(OTPVerificationMixin, RecaptchaValidationMixin, serializers.Serializer):
     email = serializers.EmailField(required=True)
     mobile = serializers.CharField(max_length=15, required=True)
     password = serializers.CharField(
@@ -766,11 +572,7 @@ class ResetNewPasswordSerializer(serializers.Serializer):
         google_recaptcha_v3_token = attrs.get('google_recaptcha_v3_token', None)
 
         # Validate reCAPTCHA if enabled
-        if not settings.DISABLE_RECAPTCHA:
-            if not google_recaptcha_v3_token:
-                raise serializers.ValidationError("Google reCAPTCHA token is required.")
-            if not self.validate_recaptcha(google_recaptcha_v3_token):
-                raise serializers.ValidationError("Invalid reCAPTCHA. Please try again.")
+        self.check_recaptcha(google_recaptcha_v3_token)
 
         # Check if the combination of email and mobile exists
         try:
@@ -778,43 +580,8 @@ class ResetNewPasswordSerializer(serializers.Serializer):
         except User.DoesNotExist:
             raise serializers.ValidationError("No user found with the provided email and mobile.")
 
-        # Retrieve the latest OTP record for password reset
-        try:
-            otp_record = OTP.objects.filter(
-                user=user,
-                email_otp=email_otp,
-                mobile_otp=mobile_otp
-            ).latest('created_at')
-        except OTP.DoesNotExist:
-            raise serializers.ValidationError("Invalid OTPs provided.")
-
-        # Check OTP expiry
-        if otp_record.expiry_time < timezone.now():
-            raise serializers.ValidationError("OTP has expired.")
-
-        # Check OTP attempts
-        if otp_record.attempts >= settings.OTP_MAX_ATTEMPTS:
-            user.lock_until = timezone.now() + timezone.timedelta(hours=settings.LOGIN_LOCK_DURATION_HOURS)
-            user.is_active = False
-            user.save()
-            raise serializers.ValidationError("Account locked due to multiple failed verification attempts. Try again after 24 hours.")
+        # The active OTP challenge must carry both password reset codes
+        self.verify_otp(user, invalid_message="Invalid OTPs provided.", email_otp=email_otp, mobile_otp=mobile_otp)
 
         attrs['user'] = user
-        attrs['otp_record'] = otp_record
         return attrs
-
-    def validate_recaptcha(self, token):
-        """
-        Validates Google reCAPTCHA v3 token.
-        """
-        secret_key = settings.GOOGLE_RECAPTCHA_SECRET_KEY
-        data = {
-            'secret': secret_key,
-            'response': token
-        }
-        try:
-            response = requests.post('https://www.google.com/recaptcha/api/siteverify', data=data)
-            result = response.json()
-            return result.get('success', False)
-        except Exception:
-            raise serializers.ValidationError("reCAPTCHA validation failed.")
\ No newline at end of file
@@ -21,9 +21,10 @@ from .serializers import (
     ResetNewPasswordSerializer 
 )
 from .models import User
-from utils.models import OTP
-from utils.email_utils import send_custom_email
-from utils.sms_otp_utils import send_otp_sms
+from utils.otp_service import issue_challenge
+from utils.login_attempts import record_failed_login, reset_failed_logins
+from utils.throttling import AUTH_THROTTLES
+from utils.notifications import notify, notification_atomic, email_notification, sms_notification
 from django.utils import timezone
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.conf import settings
@@ -43,6 +44,8 @@ def generate_otp():
 class UserRegistrationView(generics.CreateAPIView):
     serializer_class = UserRegistrationSerializer
     permission_classes = [AllowAny]
+    throttle_classes = AUTH_THROTTLES
+    throttle_scope = 'register'
 
     def post(self, request, *args, **kwargs):
         """
@@ -51,11 +54,16 @@ class UserRegistrationView(generics.CreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
-        return Response({"detail": "OTP sent to email and mobile."}, status=status.HTTP_201_CREATED)
+        return Response(
+            {"detail": "OTP sent to email and mobile.", "channels": serializer.notification_channels},
+            status=status.HTTP_201_CREATED
+        )
 
 class ResendEmailOTPView(generics.GenericAPIView):
     serializer_class = ResendEmailOTPSerializer
     permission_classes = [AllowAny]
+    throttle_classes = AUTH_THROTTLES
+    throttle_scope = 'resend_email_otp'
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -64,74 +72,30 @@ class ResendEmailOTPView(generics.GenericAPIView):
 
         user = User.objects.get(email=email)
 
-        # Check if resend OTP is locked
-        if user.otp_resend_locked_until and timezone.now() < user.otp_resend_locked_until:
-            lock_time_remaining = (user.otp_resend_locked_until - timezone.now()).seconds // 60  # in minutes
-            return Response(
-                {"detail": f"Resend OTP limit reached. Try again in {lock_time_remaining} minutes."},
-                status=status.HTTP_429_TOO_MANY_REQUESTS
-            )
-
-        # Check if resend attempts exceeded
-        if user.resend_otp_attempts >= settings.MAX_RESEND_OTP_ATTEMPTS:
-            user.otp_resend_locked_until = timezone.now() + timezone.timedelta(minutes=settings.RESEND_OTP_LOCK_DURATION_MINUTES)
-            user.save()
-            return Response(
-                {"detail": "Resend OTP limit reached. Try again later."},
-                status=status.HTTP_429_TOO_MANY_REQUESTS
-            )
-
-        # Resend Email OTP
-        self.resend_email_otp(user)
+        # Resend Email OTP (issue_challenge answers 429 once the resend limit is reached)
+        with notification_atomic():
+            self.resend_email_otp(user)
         return Response({"detail": "Email OTP resent."}, status=status.HTTP_200_OK)
 
     def resend_email_otp(self, user):
         """
-        Generates and sends a new email OTP without affecting mobile OTP.
+        Generates and queues a new email OTP without affecting mobile OTP.
         """
-        # Fetch the latest OTP
-        try:
-            otp = OTP.objects.filter(user=user).latest('created_at')
-        except OTP.DoesNotExist:
-            # Create a new OTP entry with both OTPs
-            otp_email = generate_otp()
-            otp_mobile = generate_otp()
-            expiry_time = timezone.now() + timezone.timedelta(minutes=settings.OTP_EXPIRY_MINUTES)
-            otp = OTP.objects.create(
-                user=user,
-                email_otp=otp_email,
-                mobile_otp=otp_mobile,
-                expiry_time=expiry_time,
-                is_verified=False,
-                attempts=0
-            )
-        else:
-            # Update only email_otp
-            otp.email_otp = generate_otp()
-            otp.expiry_time = timezone.now() + timezone.timedelta(minutes=settings.OTP_EXPIRY_MINUTES)
-            otp.is_verified = False
-            otp.attempts = 0
-            otp.save()
-
-        # Increment resend attempts
-        user.resend_otp_attempts += 1
-
-        # If resend attempts reach max, lock resend OTP
-        if user.resend_otp_attempts >= settings.MAX_RESEND_OTP_ATTEMPTS:
-            user.otp_resend_locked_until = timezone.now() + timezone.timedelta(minutes=settings.RESEND_OTP_LOCK_DURATION_MINUTES)
-
-        user.save()
+        # Replace only email_otp; mobile_otp is generated only if there is none yet
+        otp = issue_challenge(user, email_otp=generate_otp(), defaults={'mobile_otp': generate_otp()})
 
         # Send OTP via email
         if user.email:
             subject = "Your Email OTP Code - Resend"
             html_content = f"<p>Your OTP code is {otp.email_otp}</p>"
-            send_custom_email(subject, html_content, [user.email])
+            notify(email_notification(subject, html_content, user.email))
 
 # View for Resending Mobile OTP
 class ResendMobileOTPView(generics.GenericAPIView):
     serializer_class = ResendMobileOTPSerializer
     permission_classes = [AllowAny]
+    throttle_classes = AUTH_THROTTLES
+    throttle_scope = 'resend_mobile_otp'
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -140,73 +104,29 @@ class ResendMobileOTPView(generics.GenericAPIView):
 
         user = User.objects.get(mobile=mobile)
 
-        # Check if resend OTP is locked
-        if user.otp_resend_locked_until and timezone.now() < user.otp_resend_locked_until:
-            lock_time_remaining = (user.otp_resend_locked_until - timezone.now()).seconds // 60  # in minutes
-            return Response(
-                {"detail": f"Resend OTP limit reached. Try again in {lock_time_remaining} minutes."},
-                status=status.HTTP_429_TOO_MANY_REQUESTS
-            )
-
-        # Check if resend attempts exceeded
-        if user.resend_otp_attempts >= settings.MAX_RESEND_OTP_ATTEMPTS:
-            user.otp_resend_locked_until = timezone.now() + timezone.timedelta(minutes=settings.RESEND_OTP_LOCK_DURATION_MINUTES)
-            user.save()
-            return Response(
-                {"detail": "Resend OTP limit reached. Try again later."},
-                status=status.HTTP_429_TOO_MANY_REQUESTS
-            )
-
-        # Resend Mobile OTP
-        self.resend_mobile_otp(user)
+        # Resend Mobile OTP (issue_challenge answers 429 once the resend limit is reached)
+        with notification_atomic():
+            self.resend_mobile_otp(user)
         return Response({"detail": "Mobile OTP resent."}, status=status.HTTP_200_OK)
 
     def resend_mobile_otp(self, user):
         """
-        Generates and sends a new mobile OTP without affecting email OTP.
+        Generates and queues a new mobile OTP without affecting email OTP.
         """
-        # Fetch the latest OTP
-        try:
-            otp = OTP.objects.filter(user=user).latest('created_at')
-        except OTP.DoesNotExist:
-            # Create a new OTP entry with both OTPs
-            otp_email = generate_otp()
-            otp_mobile = generate_otp()
-            expiry_time = timezone.now() + timezone.timedelta(minutes=settings.OTP_EXPIRY_MINUTES)
-            otp = OTP.objects.create(
-                user=user,
-                email_otp=otp_email,
-                mobile_otp=otp_mobile,
-                expiry_time=expiry_time,
-                is_verified=False,
-                attempts=0
-            )
-        else:
-            # Update only mobile_otp
-            otp.mobile_otp = generate_otp()
-            otp.expiry_time = timezone.now() + timezone.timedelta(minutes=settings.OTP_EXPIRY_MINUTES)
-            otp.is_verified = False
-            otp.attempts = 0
-            otp.save()
-
-        # Increment resend attempts
-        user.resend_otp_attempts += 1
-
-        # If resend attempts reach max, lock resend OTP
-        if user.resend_otp_attempts >= settings.MAX_RESEND_OTP_ATTEMPTS:
-            user.otp_resend_locked_until = timezone.now() + timezone.timedelta(minutes=settings.RESEND_OTP_LOCK_DURATION_MINUTES)
-
-        user.save()
+        # Replace only mobile_otp; email_otp is generated only if there is none yet
+        otp = issue_challenge(user, mobile_otp=generate_otp(), defaults={'email_otp': generate_otp()})
 
         # Send OTP via SMS
         if user.mobile and user.country:
             full_mobile = f"{user.country.code}{user.mobile}"
-            send_otp_sms(full_mobile, otp.mobile_otp)
+            notify(sms_notification(full_mobile, otp.mobile_otp))
 
 # View for Verifying OTP
 class UserVerificationView(generics.GenericAPIView):
     serializer_class = UserVerificationSerializer
     permission_classes = [AllowAny]
+    throttle_classes = AUTH_THROTTLES
+    throttle_scope = 'verify_otp'
 
     def post(self, request, *args, **kwargs):
         """
@@ -216,7 +136,6 @@ class UserVerificationView(generics.GenericAPIView):
         try:
             serializer.is_valid(raise_exception=True)
             user = serializer.validated_data['user']
-            otp = OTP.objects.filter(user=user).latest('created_at')
 
             # Mark user as active
             user.is_active = True
@@ -226,7 +145,7 @@ class UserVerificationView(generics.GenericAPIView):
             if user.email:
                 subject = 'Welcome to GrowUpMore'
                 html_content = '<p>Your account has been successfully created.</p>'
-                send_custom_email(subject, html_content, [user.email])
+                notify(email_notification(subject, html_content, user.email))
 
             # Generate JWT tokens
             refresh = RefreshToken.for_user(user)  # Now properly imported
@@ -268,6 +187,8 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
 class LoginView(generics.GenericAPIView):
     serializer_class = UserLoginSerializer
     permission_classes = [AllowAny]
+    throttle_classes = AUTH_THROTTLES
+    throttle_scope = 'login'
 
     def post(self, request, *args, **kwargs):
         """
@@ -297,16 +218,15 @@ class LoginView(generics.GenericAPIView):
             logger.debug(f"User {authenticated_user} authenticated successfully.")
             if not authenticated_user.is_active:
                 # User is not active, send OTP for verification
-                self.send_verification_otp(authenticated_user)
+                with notification_atomic():
+                    channels = self.send_verification_otp(authenticated_user)
                 return Response(
-                    {"detail": "Account is not active. OTP sent to email and mobile for verification."},
+                    {"detail": "Account is not active. OTP sent to email and mobile for verification.", "channels": channels},
                     status=status.HTTP_401_UNAUTHORIZED
                 )
 
             # Reset failed login attempts on successful login
-            authenticated_user.failed_login_attempts = 0
-            authenticated_user.lock_until = None
-            authenticated_user.save()
+            reset_failed_logins(authenticated_user)
 
             # Generate JWT tokens
             refresh = RefreshToken.for_user(authenticated_user)
@@ -335,19 +255,16 @@ class LoginView(generics.GenericAPIView):
             return response
         else:
             # Failed login attempt
-            user_obj.failed_login_attempts += 1
-            remaining_attempts = settings.MAX_LOGIN_ATTEMPTS - user_obj.failed_login_attempts
+            failed_attempts, lock_until = record_failed_login(user_obj)
+            remaining_attempts = settings.MAX_LOGIN_ATTEMPTS - failed_attempts
 
-            if user_obj.failed_login_attempts >= settings.MAX_LOGIN_ATTEMPTS:
-                user_obj.lock_until = timezone.now() + timezone.timedelta(hours=settings.LOGIN_LOCK_DURATION_HOURS)
-                user_obj.save()
+            if lock_until:
                 logger.warning(f"User {identifier} account locked due to multiple failed login attempts.")
                 return Response(
-                    {"detail": "Account locked due to multiple failed login attempts. Try again after 24 hours."},
+                    {"detail": f"Account locked due to multiple failed login attempts. Try again after {settings.LOGIN_LOCK_DURATION_HOURS} hours."},
                     status=status.HTTP_403_FORBIDDEN
                 )
 
-            user_obj.save()
             logger.warning(f"Failed login attempt for user: {identifier}. Attempts remaining: {remaining_attempts}")
             return Response(
                 {"detail": f"Invalid credentials. {remaining_attempts} attempts remaining."},
@@ -356,25 +273,27 @@ class LoginView(generics.GenericAPIView):
 
     def send_verification_otp(self, user):
         """
-        Sends OTP via email and SMS for account activation.
+        Queues OTP via email and SMS for account activation.
+        Returns the per-channel delivery status from notify().
         """
         otp_email = generate_otp()
         otp_mobile = generate_otp()
-        expiry_time = timezone.now() + timezone.timedelta(minutes=settings.OTP_EXPIRY_MINUTES)
 
         # Save OTP
-        OTP.objects.create(user=user, email_otp=otp_email, mobile_otp=otp_mobile, expiry_time=expiry_time)
+        issue_challenge(user, resend=False, email_otp=otp_email, mobile_otp=otp_mobile)
 
-        # Send OTP via email
+        email = None
         if user.email:
             subject = "Your OTP Code for Account Activation"
             html_content = f"<p>Your OTP code is {otp_email}</p>"
-            send_custom_email(subject, html_content, [user.email])
+            email = email_notification(subject, html_content, user.email)
 
-        # Send OTP via SMS
+        sms = None
         if user.mobile and user.country:
             full_mobile = f"{user.country.code}{user.mobile}"
-            send_otp_sms(full_mobile, otp_mobile)
+            sms = sms_notification(full_mobile, otp_mobile)
+
+        return notify(email, sms)
 
 # Add LogoutView
 class LogoutView(generics.GenericAPIView):
@@ -405,6 +324,8 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
 class UpdateEmailView(generics.GenericAPIView):
     serializer_class = UpdateEmailSerializer
     permission_classes = [IsAuthenticated]
+    throttle_classes = AUTH_THROTTLES
+    throttle_scope = 'update_email'
 
     def post(self, request, *args, **kwargs):
         """
@@ -416,45 +337,17 @@ class UpdateEmailView(generics.GenericAPIView):
 
         user = request.user
 
-        # Check if resend OTP is locked
-        if user.otp_resend_locked_until and timezone.now() < user.otp_resend_locked_until:
-            lock_time_remaining = (user.otp_resend_locked_until - timezone.now()).seconds // 60  # in minutes
-            return Response(
-                {"detail": f"Resend OTP limit reached. Try again in {lock_time_remaining} minutes."},
-                status=status.HTTP_429_TOO_MANY_REQUESTS
-            )
-
-        # Check if resend attempts exceeded
-        if user.resend_otp_attempts >= settings.MAX_RESEND_OTP_ATTEMPTS:
-            user.otp_resend_locked_until = timezone.now() + timezone.timedelta(minutes=settings.RESEND_OTP_LOCK_DURATION_MINUTES)
-            user.save()
-            return Response(
-                {"detail": "Resend OTP limit reached. Try again later."},
-                status=status.HTTP_429_TOO_MANY_REQUESTS
-            )
-
         # Generate OTP
         email_otp = generate_otp()
 
-        # Create or update OTP record
-        otp_record, created = OTP.objects.get_or_create(user=user)
-        otp_record.new_email = new_email
-        otp_record.new_email_otp = email_otp
-        otp_record.expiry_time = timezone.now() + timezone.timedelta(minutes=settings.OTP_EXPIRY_MINUTES)
-        otp_record.is_verified = False
-        otp_record.attempts = 0
-        otp_record.save()
-
-        # Increment resend attempts
-        user.resend_otp_attempts += 1
-        if user.resend_otp_attempts >= settings.MAX_RESEND_OTP_ATTEMPTS:
-            user.otp_resend_locked_until = timezone.now() + timezone.timedelta(minutes=settings.RESEND_OTP_LOCK_DURATION_MINUTES)
-        user.save()
+        with notification_atomic():
+            # Issue the OTP for the new email
+            issue_challenge(user, new_email=new_email, new_email_otp=email_otp)
 
-        # Send OTP via email
-        subject = "Your Email Update OTP Code"
-        html_content = f"<p>Your OTP code for updating your email is {email_otp}</p>"
-        send_custom_email(subject, html_content, [new_email])
+            # Send OTP via email
+            subject = "Your Email Update OTP Code"
+            html_content = f"<p>Your OTP code for updating your email is {email_otp}</p>"
+            notify(email_notification(subject, html_content, new_email))
 
         logger.debug(f"Sent email OTP to {new_email} for user {user}")
 
@@ -463,6 +356,8 @@ class UpdateEmailView(generics.GenericAPIView):
 class UpdateEmailVerifyView(generics.GenericAPIView):
     serializer_class = UpdateEmailVerifySerializer
     permission_classes = [IsAuthenticated]
+    throttle_classes = AUTH_THROTTLES
+    throttle_scope = 'update_email_verify'
 
     def post(self, request, *args, **kwargs):
         """
@@ -470,7 +365,6 @@ class UpdateEmailVerifyView(generics.GenericAPIView):
         """
         serializer = self.get_serializer(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
-        otp = serializer.validated_data.get('otp')
         new_email = serializer.validated_data.get('new_email')
 
         user = request.user
@@ -479,10 +373,6 @@ class UpdateEmailVerifyView(generics.GenericAPIView):
         user.email = new_email
         user.save()
 
-        # Mark OTP as verified
-        otp.is_verified = True
-        otp.save()
-
         # Logout user by clearing cookies
         response = Response({"detail": "Email updated successfully and you have been logged out."}, status=status.HTTP_200_OK)
         response.delete_cookie(settings.SIMPLE_JWT['TOKEN_COOKIE'])
@@ -495,6 +385,8 @@ class UpdateEmailVerifyView(generics.GenericAPIView):
 class UpdateMobileView(generics.GenericAPIView):
     serializer_class = UpdateMobileSerializer
     permission_classes = [IsAuthenticated]
+    throttle_classes = AUTH_THROTTLES
+    throttle_scope = 'update_mobile'
 
     def post(self, request, *args, **kwargs):
         """
@@ -507,45 +399,16 @@ class UpdateMobileView(generics.GenericAPIView):
 
         user = request.user
 
-        # Check if resend OTP is locked
-        if user.otp_resend_locked_until and timezone.now() < user.otp_resend_locked_until:
-            lock_time_remaining = (user.otp_resend_locked_until - timezone.now()).seconds // 60  # in minutes
-            return Response(
-                {"detail": f"Resend OTP limit reached. Try again in {lock_time_remaining} minutes."},
-                status=status.HTTP_429_TOO_MANY_REQUESTS
-            )
-
-        # Check if resend attempts exceeded
-        if user.resend_otp_attempts >= settings.MAX_RESEND_OTP_ATTEMPTS:
-            user.otp_resend_locked_until = timezone.now() + timezone.timedelta(minutes=settings.RESEND_OTP_LOCK_DURATION_MINUTES)
-            user.save()
-            return Response(
-                {"detail": "Resend OTP limit reached. Try again later."},
-                status=status.HTTP_429_TOO_MANY_REQUESTS
-            )
-
         # Generate OTP
         mobile_otp = generate_otp()
 
-        # Create or update OTP record
-        otp_record, created = OTP.objects.get_or_create(user=user)
-        otp_record.new_mobile = new_mobile
-        otp_record.new_mobile_otp = mobile_otp
-        otp_record.country = Country.objects.get(id=country_id)  # Ensure country exists
-        otp_record.expiry_time = timezone.now() + timezone.timedelta(minutes=settings.OTP_EXPIRY_MINUTES)
-        otp_record.is_verified = False
-        otp_record.attempts = 0
-        otp_record.save()
-
-        # Increment resend attempts
-        user.resend_otp_attempts += 1
-        if user.resend_otp_attempts >= settings.MAX_RESEND_OTP_ATTEMPTS:
-            user.otp_resend_locked_until = timezone.now() + timezone.timedelta(minutes=settings.RESEND_OTP_LOCK_DURATION_MINUTES)
-        user.save()
+        with notification_atomic():
+            # Issue the OTP for the new mobile
+            issue_challenge(user, new_mobile=new_mobile, new_mobile_otp=mobile_otp)
 
-        # Send OTP via SMS
-        full_mobile = f"{user.country.code}{new_mobile}"
-        send_otp_sms(full_mobile, mobile_otp)
+            # Send OTP via SMS
+            full_mobile = f"{user.country.code}{new_mobile}"
+            notify(sms_notification(full_mobile, mobile_otp))
 
         logger.debug(f"Sent mobile OTP to {new_mobile} for user {user}")
 
@@ -554,6 +417,8 @@ class UpdateMobileView(generics.GenericAPIView):
 class UpdateMobileVerifyView(generics.GenericAPIView):
     serializer_class = UpdateMobileVerifySerializer
     permission_classes = [IsAuthenticated]
+    throttle_classes = AUTH_THROTTLES
+    throttle_scope = 'update_mobile_verify'
 
     def post(self, request, *args, **kwargs):
         """
@@ -561,7 +426,6 @@ class UpdateMobileVerifyView(generics.GenericAPIView):
         """
         serializer = self.get_serializer(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
-        otp = serializer.validated_data.get('otp')
         new_mobile = serializer.validated_data.get('new_mobile')
         country_id = serializer.validated_data.get('country')
 
@@ -572,10 +436,6 @@ class UpdateMobileVerifyView(generics.GenericAPIView):
         user.country = Country.objects.get(id=country_id)
         user.save()
 
-        # Mark OTP as verified
-        otp.is_verified = True
-        otp.save()
-
         # Logout user by clearing cookies
         response = Response({"detail": "Mobile updated successfully and you have been logged out."}, status=status.HTTP_200_OK)
         response.delete_cookie(settings.SIMPLE_JWT['TOKEN_COOKIE'])
@@ -622,6 +482,8 @@ class ForgotPasswordView(generics.GenericAPIView):
     """
     serializer_class = ForgotPasswordSerializer
     permission_classes = [AllowAny]
+    throttle_classes = AUTH_THROTTLES
+    throttle_scope = 'forgot_password'
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -630,54 +492,26 @@ class ForgotPasswordView(generics.GenericAPIView):
         new_email = serializer.validated_data.get('email')
         new_mobile = serializer.validated_data.get('mobile')
 
-        # Check if resend OTP is locked
-        if user.otp_resend_locked_until and timezone.now() < user.otp_resend_locked_until:
-            lock_time_remaining = (user.otp_resend_locked_until - timezone.now()).seconds // 60  # in minutes
-            return Response(
-                {"detail": f"Resend OTP limit reached. Try again in {lock_time_remaining} minutes."},
-                status=status.HTTP_429_TOO_MANY_REQUESTS
-            )
-
-        # Check if resend attempts exceeded
-        if user.resend_otp_attempts >= settings.MAX_RESEND_OTP_ATTEMPTS:
-            user.otp_resend_locked_until = timezone.now() + timezone.timedelta(minutes=settings.RESEND_OTP_LOCK_DURATION_MINUTES)
-            user.save()
-            return Response(
-                {"detail": "Resend OTP limit reached. Try again later."},
-                status=status.HTTP_429_TOO_MANY_REQUESTS
-            )
-
         # Generate OTPs
         email_otp = generate_otp()
         mobile_otp = generate_otp()
 
-        # Create or update OTP record
-        otp_record, created = OTP.objects.get_or_create(user=user)
-        otp_record.email_otp = email_otp
-        otp_record.mobile_otp = mobile_otp
-        otp_record.expiry_time = timezone.now() + timezone.timedelta(minutes=settings.OTP_EXPIRY_MINUTES)
-        otp_record.is_verified = False
-        otp_record.attempts = 0
-        otp_record.save()
-
-        # Increment resend attempts
-        user.resend_otp_attempts += 1
-        if user.resend_otp_attempts >= settings.MAX_RESEND_OTP_ATTEMPTS:
-            user.otp_resend_locked_until = timezone.now() + timezone.timedelta(minutes=settings.RESEND_OTP_LOCK_DURATION_MINUTES)
-        user.save()
-
-        # Send OTP via email
-        subject = "Your Password Reset OTP Code"
-        html_content = f"<p>Your OTP code for resetting your password is {email_otp}</p>"
-        send_custom_email(subject, html_content, [new_email])
-
-        # Send OTP via SMS
-        full_mobile = f"{user.country.code}{new_mobile}"
-        send_otp_sms(full_mobile, mobile_otp)
+        with notification_atomic():
+            # Issue the password reset OTPs
+            issue_challenge(user, email_otp=email_otp, mobile_otp=mobile_otp)
+
+            # Send OTP via email and SMS
+            subject = "Your Password Reset OTP Code"
+            html_content = f"<p>Your OTP code for resetting your password is {email_otp}</p>"
+            full_mobile = f"{user.country.code}{new_mobile}"
+            channels = notify(
+                email_notification(subject, html_content, new_email),
+                sms_notification(full_mobile, mobile_otp),
+            )
 
         logger.debug(f"Sent password reset OTPs to email {new_email} and mobile {new_mobile} for user {user}")
 
-        return Response({"detail": "OTPs sent to your email and mobile."}, status=status.HTTP_200_OK)
+        return Response({"detail": "OTPs sent to your email and mobile.", "channels": channels}, status=status.HTTP_200_OK)
 
 class ResetNewPasswordView(generics.GenericAPIView):
     """
@@ -685,22 +519,19 @@ class ResetNewPasswordView(generics.GenericAPIView):
     """
     serializer_class = ResetNewPasswordSerializer
     permission_classes = [AllowAny]  # AllowAny since user is not authenticated during password reset
+    throttle_classes = AUTH_THROTTLES
+    throttle_scope = 'reset_password'
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data.get('user')
-        otp_record = serializer.validated_data.get('otp_record')
         new_password = serializer.validated_data.get('password')
 
         # Update user's password
         user.set_password(new_password)
         user.save()
 
-        # Mark OTP as verified
-        otp_record.is_verified = True
-        otp_record.save()
-
         # Logout user by clearing JWT cookies (if any are present)
         response = Response({"detail": "Password reset successfully. You have been logged out."}, status=status.HTTP_200_OK)
         response.delete_cookie(settings.SIMPLE_JWT['TOKEN_COOKIE'])
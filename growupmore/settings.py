@@ -98,6 +98,35 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'utils.pagination.KendoPagination',
     'PAGE_SIZE': 10,
+    # Client address used by the '_ip' throttles: the number of reverse proxies in front of the app.
+    # 0 uses REMOTE_ADDR and ignores X-Forwarded-For, which clients can forge
+    'NUM_PROXIES': env.int('NUM_PROXIES', default=0),
+    # utils.throttling: '<view throttle_scope>_ip' per client address, '<scope>_identifier' per posted
+    # email/mobile. Each endpoint has its own scope, so one cannot use up another's budget
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': '20/min',
+        'login_identifier': '10/min',
+        'register_ip': '20/hour',
+        'register_identifier': '5/hour',
+        'forgot_password_ip': '20/hour',
+        'forgot_password_identifier': '5/hour',
+        'resend_email_otp_ip': '20/hour',
+        'resend_email_otp_identifier': '10/hour',
+        'resend_mobile_otp_ip': '20/hour',
+        'resend_mobile_otp_identifier': '10/hour',
+        'update_email_ip': '20/hour',
+        'update_email_identifier': '10/hour',
+        'update_mobile_ip': '20/hour',
+        'update_mobile_identifier': '10/hour',
+        'verify_otp_ip': '30/min',
+        'verify_otp_identifier': '10/min',
+        'update_email_verify_ip': '30/min',
+        'update_email_verify_identifier': '10/min',
+        'update_mobile_verify_ip': '30/min',
+        'update_mobile_verify_identifier': '10/min',
+        'reset_password_ip': '30/min',
+        'reset_password_identifier': '10/min',
+    },
 }
 
 # Simple JWT Configuration
@@ -162,27 +191,85 @@ CORS_ALLOW_CREDENTIALS = True
 
 # Email Configuration using SendGrid
 SENDGRID_API_KEY = env('SENDGRID_API_KEY', default='')
+SENDGRID_POOL_SIZE = 10
+SENDGRID_CONNECT_TIMEOUT = 3  # seconds
+SENDGRID_READ_TIMEOUT = 10  # seconds
 
 DEFAULT_FROM_EMAIL = "Grow Up More <info@growupmore.com>"
 
 # SMS API Key
 SMS_API_KEY = env('SMS_API_KEY', default='')
+SMS_POOL_SIZE = 10
+SMS_CONNECT_TIMEOUT = 3  # seconds
+SMS_READ_TIMEOUT = 5  # seconds
+SMS_MAX_RETRIES = 2
+SMS_RETRY_BACKOFF_SECONDS = 0.5
+SMS_CIRCUIT_FAILURE_THRESHOLD = 5  # Consecutive failures before failing fast
+SMS_CIRCUIT_RESET_SECONDS = 30  # How long to fail fast before trying the provider again
+
+# Notification Delivery Configuration
+# 'sync': OTP emails/SMS are sent inline during the request
+# 'outbox': written to the outbox and sent by `manage.py process_outbox`, which must then run
+# continuously (e.g. as a service); without it no notification is ever delivered
+NOTIFICATION_DELIVERY_MODE = env('NOTIFICATION_DELIVERY_MODE', default='sync')
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BASE_SECONDS = 10
+OUTBOX_RETRY_MAX_SECONDS = 600
+OUTBOX_LEASE_SECONDS = 120
+NOTIFICATION_DISPATCH_WORKERS = 8  # Thread pool used to fan out email+SMS in sync mode
+NOTIFICATION_DISPATCH_DEADLINE_SECONDS = 8  # Total time a request waits for its notifications
+OUTBOX_RETENTION_DAYS = 1  # Sent/failed outbox rows hold OTPs in plain text; purge_otps removes them after this
 
 # Google reCAPTCHA settings
 GOOGLE_RECAPTCHA_SECRET_KEY = env('GOOGLE_RECAPTCHA_SECRET_KEY', default='')
 GOOGLE_RECAPTCHA_SITE_KEY = env('GOOGLE_RECAPTCHA_SITE_KEY', default='')
 DISABLE_RECAPTCHA = env.bool('DISABLE_RECAPTCHA', default=False)
+RECAPTCHA_CONNECT_TIMEOUT = 2  # seconds
+RECAPTCHA_READ_TIMEOUT = 3  # seconds
+RECAPTCHA_POOL_SIZE = 10
+RECAPTCHA_VERDICT_CACHE_SECONDS = 120
 
 # OTP Configuration
 OTP_EXPIRY_MINUTES = 15
 OTP_MAX_ATTEMPTS = 5
+# Where active OTP challenges live (utils.otp_store): 'database' (the OTP table) or
+# 'cache' (OTP_CACHE_ALIAS with TTL; the table is kept as an audit trail). 'cache'
+# needs a cache shared by all workers, e.g. Redis.
+OTP_STORE = env('OTP_STORE', default='database')
+OTP_CACHE_ALIAS = 'default'
+OTP_RETENTION_DAYS = 7  # Expired OTP rows are kept this long for auditing, then removed by purge_otps
+OTP_PURGE_BATCH_SIZE = 1000
 
 # Login Configuration
 MAX_LOGIN_ATTEMPTS = 5
 LOGIN_LOCK_DURATION_HOURS = 24
+# Where failed logins are counted (utils.login_attempts): 'database' (User.failed_login_attempts)
+# or 'cache' (LOGIN_FAILURE_CACHE_ALIAS; the user row is only written when the account is locked).
+# 'cache' needs a cache shared by all workers, e.g. Redis.
+LOGIN_FAILURE_COUNTER = env('LOGIN_FAILURE_COUNTER', default='database')
+LOGIN_FAILURE_CACHE_ALIAS = 'default'
 
 # Resend OTP Configuration
 MAX_RESEND_OTP_ATTEMPTS = 5
 RESEND_OTP_LOCK_DURATION_MINUTES = 60
 
+# Master Data Cache Configuration
+# 'local': invalidate only this process (single worker / tests)
+# 'postgres': broadcast invalidations to every worker with LISTEN/NOTIFY
+MASTER_CACHE_BROADCAST = env('MASTER_CACHE_BROADCAST', default='local')
+MASTER_CACHE_MAX_ENTRIES = 1000
+MASTER_CACHE_VERSION_TTL_SECONDS = 60  # Re-read versions at least this often, even without a broadcast
+MASTER_CACHE_MAX_AGE_SECONDS = 300  # Cache-Control max-age for browsers/CDN on master data responses
+MASTER_TYPEAHEAD_DEFAULT_LIMIT = 10
+MASTER_TYPEAHEAD_MAX_LIMIT = 50
+MASTER_MULTI_GET_MAX_IDS = 100  # Upper bound for ?ids= on the master viewsets
+MASTER_IMPORT_BATCH_SIZE = 1000  # Rows per bulk_create in master data imports
+MASTER_IMPORT_MAX_REPORTED_ERRORS = 1000
+
+# Pagination totals (utils.pagination.KendoPagination): 'exact', 'cached' or 'estimated'
+KENDO_PAGINATION_TOTAL = 'exact'
+KENDO_PAGINATION_TOTAL_CACHE_SECONDS = 60
+KENDO_PAGINATION_ESTIMATE_THRESHOLD = 100000  # Rows; smaller tables are always counted exactly
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
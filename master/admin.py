@@ -1,8 +1,10 @@
 # master/admin.py
 
 from django.contrib import admin
-from .models import Country, State, City
+from .models import Country, State, City, MasterDataVersion, MasterDataTombstone
 
 admin.site.register(Country)
 admin.site.register(State)
 admin.site.register(City)
+admin.site.register(MasterDataVersion)
+admin.site.register(MasterDataTombstone)
@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class MasterConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'master'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .search import create_trigram_indexes_after_migrate
+
+        # The repo does not ship migration files, so the pg_trgm indexes are created once the tables exist
+        post_migrate.connect(create_trigram_indexes_after_migrate, sender=self)
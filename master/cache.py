@@ -0,0 +1,203 @@
+# master/cache.py
+
+import logging
+import select
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import MasterDataVersion
+
+logger = logging.getLogger(__name__)
+
+MASTER_TABLES = ('country', 'state', 'city')
+NOTIFY_CHANNEL = 'master_data_changed'
+
+
+class VersionRegistry:
+    """
+    Process-local view of MasterDataVersion.
+
+    Versions are read from the database once and then served from memory
+    until a broadcast says a table changed, or MASTER_CACHE_VERSION_TTL_SECONDS
+    passes (a safety net for missed notifications).
+    """
+
+    def __init__(self):
+        self._versions = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """
+        Registers a callable invoked with the table name whenever versions are invalidated.
+        """
+        self._listeners.append(callback)
+
+    def get(self):
+        """
+        Returns {table: (version, updated_at)} for every master table.
+        """
+        get_broadcaster().start()
+        versions = self._versions
+        if versions is None or time.monotonic() - self._loaded_at > settings.MASTER_CACHE_VERSION_TTL_SECONDS:
+            with self._lock:
+                loaded = {
+                    row.table: (row.version, row.updated_at)
+                    for row in MasterDataVersion.objects.filter(table__in=MASTER_TABLES)
+                }
+                versions = {table: loaded.get(table, (0, None)) for table in MASTER_TABLES}
+                if versions != self._versions:
+                    for callback in self._listeners:
+                        callback(None)
+                self._versions = versions
+                self._loaded_at = time.monotonic()
+        return versions
+
+    def invalidate(self, table=None):
+        """
+        Forgets the cached versions so the next get() re-reads them.
+
+        :param table: The table that changed, or None if unknown
+        """
+        with self._lock:
+            self._versions = None
+        for callback in self._listeners:
+            callback(table)
+
+
+versions = VersionRegistry()
+
+
+def bump_version(table):
+    """
+    Records a change to a master table.
+
+    Runs inside the writer's transaction, so the new version commits together
+    with the data; other workers are told to re-read versions after commit.
+
+    :param table: One of MASTER_TABLES
+    :return: The table's new version
+    """
+    updated = MasterDataVersion.objects.filter(table=table).update(
+        version=F('version') + 1, updated_at=timezone.now()
+    )
+    if not updated:
+        MasterDataVersion.objects.get_or_create(table=table, defaults={'version': 1})
+    transaction.on_commit(lambda: get_broadcaster().publish(table))
+    return MasterDataVersion.objects.filter(table=table).values_list('version', flat=True).get()
+
+
+class LocalBroadcaster:
+    """
+    In-process stand-in for a pub/sub channel. Suitable for single-process
+    deployments and tests; other processes only pick changes up through the
+    version TTL.
+    """
+
+    def start(self):
+        pass
+
+    def publish(self, table):
+        versions.invalidate(table)
+
+
+class PostgresBroadcaster(LocalBroadcaster):
+    """
+    Broadcasts changes to every worker with Postgres LISTEN/NOTIFY.
+
+    Each process runs one daemon thread holding a dedicated connection that
+    LISTENs on NOTIFY_CHANNEL and invalidates the local registry.
+    """
+
+    def __init__(self):
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._listen, name='master-cache-listener', daemon=True)
+                self._thread.start()
+
+    def publish(self, table):
+        super().publish(table)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [NOTIFY_CHANNEL, table])
+
+    def _listen(self):
+        while True:
+            listener = connections.create_connection('default')
+            try:
+                listener.ensure_connection()
+                listener.set_autocommit(True)
+                raw = listener.connection
+                with raw.cursor() as cursor:
+                    cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                # Anything published while we were not listening has been missed
+                versions.invalidate()
+                while True:
+                    if select.select([raw], [], [], 30) == ([], [], []):
+                        continue
+                    raw.poll()
+                    while raw.notifies:
+                        versions.invalidate(raw.notifies.pop(0).payload)
+            except Exception as e:
+                logger.error(f"Master data listener failed, reconnecting: {str(e)}")
+                time.sleep(5)
+            finally:
+                listener.close()
+
+
+_broadcaster = None
+
+
+def get_broadcaster():
+    global _broadcaster
+    if _broadcaster is None:
+        _broadcaster = PostgresBroadcaster() if settings.MASTER_CACHE_BROADCAST == 'postgres' else LocalBroadcaster()
+    return _broadcaster
+
+
+class ResponseCache:
+    """
+    Bounded LRU of serialized master data responses.
+
+    Keys embed the versions of every table a response depends on, so an entry
+    built before a change can never be served after it.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        versions.add_listener(lambda table: self.clear())
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def set(self, key, data):
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = ResponseCache(settings.MASTER_CACHE_MAX_ENTRIES)
@@ -0,0 +1,86 @@
+# master/fast_serializers.py
+
+import threading
+
+from rest_framework import serializers
+
+# Field types whose to_representation() is a plain conversion of the column value
+SCALAR_CONVERTERS = {
+    serializers.IntegerField: int,
+    serializers.CharField: str,
+}
+
+_plans = {}
+_plans_lock = threading.Lock()
+
+
+def compile_plan(serializer, prefix=''):
+    """
+    Translates a read-only ModelSerializer into a list of steps over values()
+    rows: (output key, column path, converter) for scalar fields and
+    (output key, foreign key path, nested steps) for nested serializers.
+
+    :return: The steps, or None if any field needs the full serializer
+             (method fields, custom to_representation, many=True, ...)
+    """
+    if type(serializer).to_representation is not serializers.Serializer.to_representation:
+        return None
+    steps = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            return None
+        path = prefix + field.source.replace('.', '__')
+        if isinstance(field, serializers.ModelSerializer):
+            nested = compile_plan(field, prefix=path + '__')
+            if nested is None:
+                return None
+            steps.append((name, path, nested))
+        elif type(field) is serializers.PrimaryKeyRelatedField and field.pk_field is None:
+            steps.append((name, path, None))
+        elif type(field) in SCALAR_CONVERTERS:
+            steps.append((name, path, SCALAR_CONVERTERS[type(field)]))
+        else:
+            return None
+    return steps
+
+
+def get_plan(serializer):
+    """
+    Returns the cached plan for a serializer class and its (possibly
+    trimmed) field set, compiling it on first use.
+    """
+    key = (type(serializer), tuple(serializer.fields))
+    if key not in _plans:
+        plan = compile_plan(serializer)
+        with _plans_lock:
+            _plans[key] = plan
+    return _plans[key]
+
+
+def plan_paths(steps):
+    paths = []
+    for key, path, convert in steps:
+        paths.append(path)
+        if isinstance(convert, list):
+            paths.extend(plan_paths(convert))
+    return paths
+
+
+def build_row(row, steps):
+    """
+    Builds the same dict the serializer would for one values() row.
+    """
+    data = {}
+    for key, path, convert in steps:
+        value = row[path]
+        if value is None:
+            data[key] = None
+        elif convert is None:
+            data[key] = value
+        elif isinstance(convert, list):
+            data[key] = build_row(row, convert)
+        else:
+            data[key] = convert(value)
+    return data
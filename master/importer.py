@@ -0,0 +1,390 @@
+# master/importer.py
+
+import codecs
+import csv
+import json
+import logging
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .cache import bump_version
+from .models import Country, State, City
+from .sync import next_change_version
+
+logger = logging.getLogger(__name__)
+
+
+class RowError(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def detect_format(name):
+    """
+    Guesses the input format from a file name or Content-Type.
+
+    :return: 'jsonl' or 'csv'
+    """
+    name = (name or '').lower()
+    if name.endswith(('.jsonl', '.ndjson')) or 'json' in name:
+        return 'jsonl'
+    return 'csv'
+
+
+NOT_UTF8_MESSAGE = "The file is not valid UTF-8 text. The rest of the file was not imported."
+
+
+def read_records(stream, file_format):
+    """
+    Lazily parses a binary stream of CSV (with a header row) or JSON Lines.
+
+    Input that is not UTF-8, or CSV that cannot be parsed, is reported as an
+    error on the line where it was found and ends the import there: the rows
+    before it are still imported.
+
+    :return: Iterator of (row number, record dict or None, error message or None)
+    """
+    lines = codecs.iterdecode(stream, 'utf-8-sig')
+    if file_format == 'csv':
+        reader = csv.DictReader(lines)
+        # Errors are raised before reader.line_num counts the offending line
+        try:
+            for record in reader:
+                yield reader.line_num, record, None
+        except UnicodeDecodeError:
+            yield reader.line_num + 1, None, NOT_UTF8_MESSAGE
+        except csv.Error as e:
+            yield reader.line_num + 1, None, f"Invalid CSV: {str(e)}. The rest of the file was not imported."
+        return
+
+    number = 0
+    try:
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield number, None, f"Invalid JSON: {str(e)}"
+                continue
+            if not isinstance(record, dict):
+                yield number, None, "Each line must be a JSON object."
+                continue
+            yield number, record, None
+    except UnicodeDecodeError:
+        yield number + 1, None, NOT_UTF8_MESSAGE
+
+
+def casefold(value):
+    return ' '.join(str(value).split()).casefold()
+
+
+class MasterImporter:
+    """
+    Streams records into one master table in batches.
+
+    Parent references are resolved from maps loaded once up front, rows that
+    already hold the same values are skipped, and the rest are written with
+    one bulk_create(update_conflicts=True) per batch on the table's unique
+    key. A batch that still hits a constraint (e.g. a concurrent writer) is
+    retried row by row so only the offending rows are reported.
+
+    bulk_create() sends no signals, so each batch stamps change_version and
+    bumps the table version itself.
+    """
+    table = None
+    model = None
+    unique_fields = ()
+    update_fields = ()
+
+    def __init__(self, batch_size=None):
+        self.batch_size = batch_size or settings.MASTER_IMPORT_BATCH_SIZE
+        self.seen = set()
+        self.created = self.updated = self.unchanged = self.failed = 0
+        self.errors = []
+        self.load()
+
+    def load(self):
+        raise NotImplementedError
+
+    def build(self, record):
+        """
+        Returns (instance, is_new), or None if the row is already up to date.
+
+        :raises RowError: If the row is invalid
+        """
+        raise NotImplementedError
+
+    def clean(self, record, fields):
+        values, errors = {}, {}
+        for field in fields:
+            value = record.get(field)
+            value = '' if value is None else ' '.join(str(value).split())
+            max_length = self.model._meta.get_field(field).max_length
+            if not value:
+                errors[field] = ["This field is required."]
+            elif len(value) > max_length:
+                errors[field] = [f"Ensure this field has no more than {max_length} characters."]
+            values[field] = value
+        if errors:
+            raise RowError(errors)
+        return values
+
+    def check_duplicate(self, key):
+        if key in self.seen:
+            raise RowError({'non_field_errors': ["Duplicate row in this import."]})
+        self.seen.add(key)
+
+    def add_error(self, number, errors):
+        self.failed += 1
+        if len(self.errors) < settings.MASTER_IMPORT_MAX_REPORTED_ERRORS:
+            self.errors.append({'row': number, 'errors': errors})
+
+    def run(self, records):
+        batch = []
+        for number, record, error in records:
+            if error:
+                self.add_error(number, {'non_field_errors': [error]})
+                continue
+            try:
+                built = self.build(record)
+            except RowError as e:
+                self.add_error(number, e.errors)
+                continue
+            if built is None:
+                self.unchanged += 1
+                continue
+            batch.append((number, *built))
+            if len(batch) >= self.batch_size:
+                self.write(batch)
+                batch = []
+        if batch:
+            self.write(batch)
+        return self.summary()
+
+    def upsert(self, instances):
+        version = next_change_version()
+        for instance in instances:
+            instance.change_version = version
+        self.model.objects.bulk_create(
+            instances,
+            update_conflicts=True,
+            unique_fields=self.unique_fields,
+            update_fields=[*self.update_fields, 'change_version'],
+        )
+
+    def count(self, rows):
+        for number, instance, is_new in rows:
+            if is_new:
+                self.created += 1
+            else:
+                self.updated += 1
+
+    def write(self, batch):
+        try:
+            with transaction.atomic():
+                self.upsert([instance for number, instance, is_new in batch])
+                bump_version(self.table)
+            self.count(batch)
+            return
+        except IntegrityError as e:
+            logger.warning(f"Bulk {self.table} import batch failed, retrying row by row: {str(e)}")
+
+        written = []
+        with transaction.atomic():
+            for row in batch:
+                try:
+                    with transaction.atomic():
+                        self.upsert([row[1]])
+                    written.append(row)
+                except IntegrityError as e:
+                    self.add_error(row[0], {'non_field_errors': [str(e)]})
+            if written:
+                bump_version(self.table)
+        self.count(written)
+
+    def summary(self):
+        return {
+            'table': self.table,
+            'created': self.created,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'failed': self.failed,
+            'errors': self.errors,
+        }
+
+
+class ParentMaps:
+    """
+    Resolves country and state references given by id, or by name/code.
+    """
+
+    def load_countries(self):
+        self.country_ids = set()
+        self.country_refs = {}
+        for pk, name, code in Country.objects.values_list('id', 'name', 'code').iterator():
+            self.country_ids.add(pk)
+            self.country_refs[casefold(code)] = pk
+            self.country_refs[casefold(name)] = pk
+
+    def resolve_country(self, record):
+        if record.get('country_id') not in (None, ''):
+            try:
+                pk = int(record['country_id'])
+            except (TypeError, ValueError):
+                pk = None
+            if pk not in self.country_ids:
+                raise RowError({'country_id': ["Unknown country."]})
+            return pk
+        if record.get('country') in (None, ''):
+            raise RowError({'country': ["Give a country name or code, or country_id."]})
+        pk = self.country_refs.get(casefold(record['country']))
+        if pk is None:
+            raise RowError({'country': [f"Unknown country '{record['country']}'."]})
+        return pk
+
+
+class CountryImporter(MasterImporter):
+    """
+    Columns: name, code. Rows are matched on code; a new name renames the country.
+    """
+    table = 'country'
+    model = Country
+    unique_fields = ['code']
+    update_fields = ['name']
+
+    def load(self):
+        self.names_by_code = {}
+        self.codes_by_name = {}
+        for name, code in Country.objects.values_list('name', 'code').iterator():
+            self.names_by_code[code] = name
+            self.codes_by_name[name] = code
+
+    def build(self, record):
+        values = self.clean(record, ('name', 'code'))
+        name, code = values['name'], values['code']
+        self.check_duplicate(code)
+        owner = self.codes_by_name.get(name)
+        if owner is not None and owner != code:
+            raise RowError({'name': [f"Country with this name already exists with code {owner}."]})
+        existing = self.names_by_code.get(code)
+        if existing == name:
+            return None
+        self.codes_by_name.pop(existing, None)
+        self.codes_by_name[name] = code
+        self.names_by_code[code] = name
+        return Country(name=name, code=code), existing is None
+
+
+class StateImporter(ParentMaps, MasterImporter):
+    """
+    Columns: name, and country (name or code) or country_id.
+    """
+    table = 'state'
+    model = State
+    unique_fields = ['country', 'name']
+
+    def load(self):
+        self.load_countries()
+        self.existing = set(State.objects.values_list('country_id', 'name').iterator())
+
+    def build(self, record):
+        errors = {}
+        try:
+            name = self.clean(record, ('name',))['name']
+        except RowError as e:
+            errors.update(e.errors)
+        try:
+            country_id = self.resolve_country(record)
+        except RowError as e:
+            errors.update(e.errors)
+        if errors:
+            raise RowError(errors)
+        key = (country_id, name)
+        self.check_duplicate(key)
+        if key in self.existing:
+            return None
+        return State(country_id=country_id, name=name), True
+
+
+class CityImporter(ParentMaps, MasterImporter):
+    """
+    Columns: name, and state_id or state (name) with country (name or code)
+    when the state name is not unique across countries.
+    """
+    table = 'city'
+    model = City
+    unique_fields = ['state', 'name']
+    # bulk_create() bypasses City.save(), so the denormalized country is set here
+    update_fields = ['country']
+
+    def load(self):
+        self.load_countries()
+        self.state_countries = {}
+        self.states_by_name = {}
+        for pk, name, country_id in State.objects.values_list('id', 'name', 'country_id').iterator():
+            self.state_countries[pk] = country_id
+            self.states_by_name.setdefault(casefold(name), {})[country_id] = pk
+        self.existing = set(City.objects.values_list('state_id', 'name').iterator())
+
+    def resolve_state(self, record):
+        if record.get('state_id') not in (None, ''):
+            try:
+                pk = int(record['state_id'])
+            except (TypeError, ValueError):
+                pk = None
+            if pk not in self.state_countries:
+                raise RowError({'state_id': ["Unknown state."]})
+            return pk
+        if record.get('state') in (None, ''):
+            raise RowError({'state': ["Give a state name, or state_id."]})
+        candidates = self.states_by_name.get(casefold(record['state']), {})
+        if record.get('country') not in (None, '') or record.get('country_id') not in (None, ''):
+            pk = candidates.get(self.resolve_country(record))
+        elif len(candidates) > 1:
+            raise RowError({'state': ["State name exists in several countries; give country or state_id."]})
+        else:
+            pk = next(iter(candidates.values()), None)
+        if pk is None:
+            raise RowError({'state': [f"Unknown state '{record['state']}'."]})
+        return pk
+
+    def build(self, record):
+        errors = {}
+        try:
+            name = self.clean(record, ('name',))['name']
+        except RowError as e:
+            errors.update(e.errors)
+        try:
+            state_id = self.resolve_state(record)
+        except RowError as e:
+            errors.update(e.errors)
+        if errors:
+            raise RowError(errors)
+        key = (state_id, name)
+        self.check_duplicate(key)
+        if key in self.existing:
+            return None
+        return City(state_id=state_id, country_id=self.state_countries[state_id], name=name), True
+
+
+IMPORTERS = {
+    'country': CountryImporter,
+    'state': StateImporter,
+    'city': CityImporter,
+}
+
+
+def import_master_data(table, stream, file_format, batch_size=None):
+    """
+    Imports a CSV or JSON Lines stream into a master table.
+
+    :param table: 'country', 'state' or 'city'
+    :param stream: Binary file-like object or iterable of byte lines
+    :param file_format: 'csv' or 'jsonl'
+    :return: Summary dict with created/updated/unchanged/failed counts and per-row errors
+    """
+    importer = IMPORTERS[table](batch_size=batch_size)
+    return importer.run(read_records(stream, file_format))
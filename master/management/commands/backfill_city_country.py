@@ -0,0 +1,30 @@
+# master/management/commands/backfill_city_country.py
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from django.core.management.base import BaseCommand
+
+from master.cache import bump_version
+from master.models import City, State
+
+
+class Command(BaseCommand):
+    help = "Copies each city's state.country into City.country where it is missing or out of date."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help="Number of cities updated per transaction.")
+
+    def handle(self, *args, **options):
+        stale = City.objects.exclude(country_id=F('state__country_id')).order_by('pk')
+        state_country = Subquery(State.objects.filter(pk=OuterRef('state_id')).values('country_id')[:1])
+        total = 0
+        while True:
+            ids = list(stale.values_list('pk', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            with transaction.atomic():
+                total += City.objects.filter(pk__in=ids).update(country_id=state_country)
+                bump_version('city')
+            self.stdout.write(f"Backfilled {total} cities...")
+        self.stdout.write(f"Done: {total} cities updated.")
@@ -0,0 +1,32 @@
+# master/management/commands/import_master_data.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from master.importer import IMPORTERS, detect_format, import_master_data
+
+
+class Command(BaseCommand):
+    help = "Bulk upserts countries, states or cities from a CSV (with header) or JSON Lines file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('table', choices=sorted(IMPORTERS), help="Master table to import into.")
+        parser.add_argument('path', help="File to import.")
+        parser.add_argument('--format', dest='file_format', choices=['csv', 'jsonl'],
+                            help="Input format (default: guessed from the file extension).")
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Rows per bulk insert (default: MASTER_IMPORT_BATCH_SIZE).")
+
+    def handle(self, *args, **options):
+        file_format = options['file_format'] or detect_format(options['path'])
+        try:
+            with open(options['path'], 'rb') as stream:
+                result = import_master_data(options['table'], stream, file_format, options['batch_size'])
+        except OSError as e:
+            raise CommandError(f"Could not read {options['path']}: {str(e)}")
+
+        for error in result['errors']:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        self.stdout.write(
+            f"Imported {result['table']}: {result['created']} created, {result['updated']} updated, "
+            f"{result['unchanged']} unchanged, {result['failed']} failed."
+        )
@@ -0,0 +1,226 @@
+# master/mixins.py
+
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from .cache import versions, response_cache
+from .fast_serializers import get_plan, plan_paths, build_row
+
+
+class MasterDataCacheMixin:
+    """
+    Serves list and retrieve responses from the in-process master data cache,
+    with HTTP validators derived from the table versions.
+
+    Subclasses set cache_tables to every table their serialized output depends
+    on (e.g. a City response embeds its State and Country).
+    """
+    cache_tables = ()
+
+    def get_cache_key(self, request):
+        current = versions.get()
+        return (
+            self.basename,
+            self.action,
+            tuple(current[table][0] for table in self.cache_tables),
+            request.get_full_path(),
+        )
+
+    def get_total_cache_version(self):
+        """
+        Version stamp for KendoPagination's cached totals.
+        """
+        current = versions.get()
+        return tuple(current[table][0] for table in self.cache_tables)
+
+    def get_last_modified(self):
+        """
+        Latest change time across cache_tables, as a Unix timestamp (or None).
+        """
+        current = versions.get()
+        timestamps = [current[table][1].timestamp() for table in self.cache_tables if current[table][1]]
+        return int(max(timestamps)) if timestamps else None
+
+    def set_validators(self, response, etag, last_modified):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, public=True, max_age=settings.MASTER_CACHE_MAX_AGE_SECONDS)
+        return response
+
+    def cached_response(self, request, build):
+        key = self.get_cache_key(request)
+        # The key already identifies the payload, so the ETag never requires serializing it
+        etag = 'W/"%s"' % hashlib.md5(repr(key).encode('utf-8')).hexdigest()
+        last_modified = self.get_last_modified()
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return self.set_validators(not_modified, etag, last_modified)
+
+        data = response_cache.get(key)
+        if data is None:
+            response = build()
+            if response.status_code != 200:
+                return response
+            response_cache.set(key, response.data)
+        else:
+            response = Response(data)
+        return self.set_validators(response, etag, last_modified)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(MasterDataCacheMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(MasterDataCacheMixin, self).retrieve(request, *args, **kwargs))
+
+
+class FlatExpandMixin:
+    """
+    Supports ?expand=none on list/retrieve: parents are returned as ids only,
+    for clients that already hold the parent lists, and the joins are skipped.
+    """
+    flat_serializer_class = None
+    flat_queryset = None
+
+    def is_flat(self):
+        return (
+            self.action in ('list', 'retrieve')
+            and self.request.query_params.get('expand') == 'none'
+        )
+
+    def get_serializer_class(self):
+        if self.is_flat():
+            return self.flat_serializer_class
+        return super().get_serializer_class()
+
+    def get_queryset(self):
+        if self.is_flat():
+            return self.flat_queryset.all()
+        return super().get_queryset()
+
+
+class MultiGetMixin:
+    """
+    Supports ?ids=1,2,3 on list: the rows are fetched with one IN query and
+    returned unpaginated in the order requested, with the ids that do not
+    exist listed under 'missing'. Other filters still apply.
+    """
+    ids_query_param = 'ids'
+
+    def get_requested_ids(self):
+        ids = []
+        for value in self.request.query_params[self.ids_query_param].split(','):
+            value = value.strip()
+            if not value:
+                continue
+            try:
+                pk = int(value)
+            except ValueError:
+                raise ValidationError({self.ids_query_param: f"'{value}' is not a valid id."})
+            if pk not in ids:
+                ids.append(pk)
+        if len(ids) > settings.MASTER_MULTI_GET_MAX_IDS:
+            raise ValidationError({self.ids_query_param: f"At most {settings.MASTER_MULTI_GET_MAX_IDS} ids per request."})
+        return ids
+
+    def list(self, request, *args, **kwargs):
+        if self.ids_query_param not in request.query_params:
+            return super().list(request, *args, **kwargs)
+        ids = self.get_requested_ids()
+        rows = {row.pk: row for row in self.filter_queryset(self.get_queryset()).filter(pk__in=ids)}
+        serializer = self.get_serializer([rows[pk] for pk in ids if pk in rows], many=True)
+        return Response({
+            'results': serializer.data,
+            'missing': [pk for pk in ids if pk not in rows],
+        })
+
+
+class FastListMixin:
+    """
+    Read-only list path that skips per-object serializer work: the rows are
+    fetched with values() and turned into the serializer's exact output by a
+    plan compiled once per serializer and field set (see
+    master.fast_serializers). Serializers with fields the plan cannot
+    express fall back to the regular list().
+    """
+
+    def list(self, request, *args, **kwargs):
+        steps = get_plan(self.get_serializer())
+        if steps is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        paths = plan_paths(steps)
+        paginator = self.paginator
+        if paginator is not None and getattr(paginator, 'cursor_query_param', None) in request.query_params:
+            # Keyset pagination reads the ordering values from the last row
+            paths += [field.lstrip('-') for field in paginator.get_cursor_ordering(queryset, self)]
+        queryset = queryset.values(*dict.fromkeys(paths))
+
+        page = self.paginate_queryset(queryset)
+        data = [build_row(row, steps) for row in (queryset if page is None else page)]
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+
+class SideloadMixin:
+    """
+    Opt-in normalized list shape (?sideload=true): rows are returned flat,
+    with parent ids only, and every referenced parent appears once in an
+    'included' section, e.g. {"results": [...], "included": {"states": [...],
+    "countries": [...]}}.
+
+    sideload lists (row key, included key, model, fields) from the nearest
+    parent outwards; each parent after the first is reached through the one
+    before it, so all of them are loaded with a single query.
+    """
+    sideload_query_param = 'sideload'
+    sideload = ()
+
+    def is_sideloaded(self):
+        return (
+            self.action == 'list'
+            and self.request.query_params.get(self.sideload_query_param, '').lower() in ('1', 'true')
+        )
+
+    def is_flat(self):
+        return super().is_flat() or self.is_sideloaded()
+
+    def get_included(self, rows):
+        included = {included_key: {} for row_key, included_key, model, fields in self.sideload}
+        first_key, first_model = self.sideload[0][0], self.sideload[0][2]
+        ids = {row[first_key] for row in rows if row.get(first_key) is not None}
+        if ids:
+            prefixes, prefix = [], ''
+            for index, (row_key, included_key, model, fields) in enumerate(self.sideload):
+                if index:
+                    prefix += f'{row_key}__'
+                prefixes.append(prefix)
+            columns = [
+                prefix + field
+                for prefix, (row_key, included_key, model, fields) in zip(prefixes, self.sideload)
+                for field in fields
+            ]
+            # One query for all parents, on top of the list's query budget (utils.mixins.QueryBudgetMixin)
+            self.extra_query_budget = getattr(self, 'extra_query_budget', 0) + 1
+            for record in first_model.objects.filter(pk__in=ids).values(*columns):
+                for prefix, (row_key, included_key, model, fields) in zip(prefixes, self.sideload):
+                    pk = record[prefix + 'id']
+                    if pk is not None:
+                        included[included_key][pk] = {field: record[prefix + field] for field in fields}
+        return {key: [parents[pk] for pk in sorted(parents)] for key, parents in included.items()}
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if not self.is_sideloaded() or response.status_code != 200:
+            return response
+        data = response.data if isinstance(response.data, dict) else {'results': response.data}
+        data['included'] = self.get_included(data['results'])
+        response.data = data
+        return response
@@ -1,30 +1,113 @@
 # master/models.py
 
-from django.db import models
+from django.db import models, router, transaction
 
-class Country(models.Model):
+class ChangeVersionMixin:
+    """
+    Saves the row in the same transaction as the change_version stamped by
+    master.signals.stamp_change_version. Model.save() runs pre_save outside
+    any transaction, so the counter would otherwise commit before the row
+    and a sync in between would move past a version it never saw.
+    """
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+
+class Country(ChangeVersionMixin, models.Model):
     name = models.CharField(max_length=100, unique=True)
     code = models.CharField(max_length=10, unique=True)  # e.g., +91
+    change_version = models.BigIntegerField(default=0, db_index=True, editable=False)
 
     def __str__(self):
         return self.name
 
-class State(models.Model):
+class State(ChangeVersionMixin, models.Model):
     country = models.ForeignKey(Country, related_name='states', on_delete=models.CASCADE)
     name = models.CharField(max_length=100)
+    change_version = models.BigIntegerField(default=0, db_index=True, editable=False)
 
     class Meta:
         unique_together = ('country', 'name')
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so save() only touches the cities when the state moved
+        instance._loaded_country_id = instance.__dict__.get('country_id', models.DEFERRED)
+        return instance
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        saves_country = update_fields is None or bool({'country', 'country_id'} & set(update_fields))
+        # A new state has no cities; an unknown loaded country counts as a move
+        moved = (
+            saves_country
+            and not self._state.adding
+            and getattr(self, '_loaded_country_id', models.DEFERRED) != self.country_id
+        )
+        if moved:
+            using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+            with transaction.atomic(using=using, savepoint=False):
+                super().save(*args, **kwargs)
+                # Keep City.country in step when a state moves to another country
+                self.cities.exclude(country_id=self.country_id).update(country_id=self.country_id)
+        else:
+            super().save(*args, **kwargs)
+        if saves_country:
+            self._loaded_country_id = self.country_id
+
     def __str__(self):
         return f"{self.name}, {self.country.code}"
 
-class City(models.Model):
+class City(ChangeVersionMixin, models.Model):
     state = models.ForeignKey(State, related_name='cities', on_delete=models.CASCADE)
     name = models.CharField(max_length=100)
+    # Copy of state.country so cities can be filtered by country without joining State
+    country = models.ForeignKey(Country, related_name='cities', on_delete=models.CASCADE, null=True, editable=False)
+    change_version = models.BigIntegerField(default=0, db_index=True, editable=False)
 
     class Meta:
         unique_together = ('state', 'name')
+        indexes = [models.Index(fields=['country', 'name'])]
+
+    def save(self, *args, **kwargs):
+        self.country_id = self.state.country_id
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'state' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'country'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.name}, {self.state.name}"
+
+class MasterDataVersion(models.Model):
+    """
+    Change counter per master table, bumped whenever a Country, State or City
+    row is saved or deleted. Used to invalidate cached master data.
+
+    The 'sync' row is the global counter stamped on rows and tombstones as
+    change_version for delta sync (see master.sync).
+    """
+    table = models.CharField(max_length=50, unique=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.table} v{self.version}"
+
+class MasterDataTombstone(models.Model):
+    """
+    Marks a deleted Country, State or City row so delta sync clients can drop it.
+    """
+    table = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    change_version = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['table', 'change_version'])]
+
+    def __str__(self):
+        return f"{self.table} #{self.object_id} deleted at v{self.change_version}"
@@ -0,0 +1,80 @@
+# master/search.py
+
+import logging
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connections
+from django.db.models.functions import Greatest
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from .models import Country, State, City
+
+logger = logging.getLogger(__name__)
+
+# (model, column) pairs searched by the master viewsets
+TRIGRAM_INDEXED_COLUMNS = (
+    (Country, 'name'),
+    (Country, 'code'),
+    (State, 'name'),
+    (City, 'name'),
+)
+
+
+class TrigramSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter for master data.
+
+    SearchFilter's icontains lookups compile on Postgres to
+    UPPER("column"::text) LIKE UPPER('%term%'), which the pg_trgm GIN
+    expression indexes from create_trigram_indexes() serve. Results are then
+    ranked by trigram similarity to the search text unless the client asked
+    for an explicit ordering. Other databases (e.g. SQLite in tests) get the
+    plain SearchFilter behaviour.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        queryset = super().filter_queryset(request, queryset, view)
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+        if not search_fields or not search_terms:
+            return queryset
+        if connections[queryset.db].vendor != 'postgresql':
+            return queryset
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            return queryset
+
+        text = ' '.join(search_terms)
+        similarities = [TrigramSimilarity(field.lstrip('^=@$'), text) for field in search_fields]
+        rank = similarities[0] if len(similarities) == 1 else Greatest(*similarities)
+        return queryset.annotate(search_rank=rank).order_by('-search_rank', 'pk')
+
+
+def create_trigram_indexes(using='default'):
+    """
+    Creates the pg_trgm extension and a GIN trigram index on
+    UPPER("column"::text) for every searched column: the exact expression
+    Django's icontains puts on the left of LIKE, so the planner can use it.
+    Idempotent; a no-op off Postgres.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        except Exception as e:
+            logger.warning(f"Could not create the pg_trgm extension; master search will not use trigram indexes: {str(e)}")
+            return
+        for model, column in TRIGRAM_INDEXED_COLUMNS:
+            table = model._meta.db_table
+            # Replaces the earlier index on the bare column, which icontains cannot use
+            cursor.execute(f'DROP INDEX IF EXISTS "{table}_{column}_trgm"')
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS "{table}_{column}_upper_trgm" '
+                f'ON "{table}" USING gin ((UPPER("{column}"::text)) gin_trgm_ops)'
+            )
+
+
+def create_trigram_indexes_after_migrate(sender, using='default', **kwargs):
+    create_trigram_indexes(using)
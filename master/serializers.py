@@ -2,13 +2,14 @@
 
 from rest_framework import serializers
 from .models import Country, State, City
+from utils.serializers import SparseFieldsetMixin
 
-class CountrySerializer(serializers.ModelSerializer):
+class CountrySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Country
-        fields = '__all__'
+        fields = ['id', 'name', 'code']
 
-class StateSerializer(serializers.ModelSerializer):
+class StateSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     country = CountrySerializer(read_only=True)
     country_id = serializers.PrimaryKeyRelatedField(
         queryset=Country.objects.all(), source='country', write_only=True
@@ -18,7 +19,7 @@ class StateSerializer(serializers.ModelSerializer):
         model = State
         fields = ['id', 'name', 'country', 'country_id']
 
-class CitySerializer(serializers.ModelSerializer):
+class CitySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     state = StateSerializer(read_only=True)
     state_id = serializers.PrimaryKeyRelatedField(
         queryset=State.objects.all(), source='state', write_only=True
@@ -27,3 +28,21 @@ class CitySerializer(serializers.ModelSerializer):
     class Meta:
         model = City
         fields = ['id', 'name', 'state', 'state_id']
+
+class FlatStateSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Read-only State representation with the country as a plain id (?expand=none).
+    """
+    class Meta:
+        model = State
+        fields = ['id', 'name', 'country']
+        read_only_fields = fields
+
+class FlatCitySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Read-only City representation with the state as a plain id (?expand=none).
+    """
+    class Meta:
+        model = City
+        fields = ['id', 'name', 'state']
+        read_only_fields = fields
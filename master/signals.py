@@ -0,0 +1,43 @@
+# master/signals.py
+
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import Country, State, City, MasterDataTombstone
+from .cache import bump_version
+from .sync import next_change_version
+from .typeahead import geo_typeahead
+
+
+@receiver(pre_save, sender=Country)
+@receiver(pre_save, sender=State)
+@receiver(pre_save, sender=City)
+def stamp_change_version(sender, instance, **kwargs):
+    """
+    Stamps the row with the next global change version for delta sync.
+    """
+    instance.change_version = next_change_version()
+
+
+@receiver(post_save, sender=Country)
+@receiver(post_save, sender=State)
+@receiver(post_save, sender=City)
+@receiver(post_delete, sender=Country)
+@receiver(post_delete, sender=State)
+@receiver(post_delete, sender=City)
+def master_data_changed(sender, instance, signal, **kwargs):
+    """
+    Bumps the table version so cached master data is invalidated everywhere,
+    and applies the row to this process's typeahead index.
+    Queryset.update() and bulk_create() do not send these signals; callers
+    using them must call bump_version() themselves and stamp change_version
+    with next_change_version().
+    """
+    table = sender._meta.model_name
+    deleted = signal is post_delete
+    if deleted:
+        MasterDataTombstone.objects.create(table=table, object_id=instance.pk, change_version=next_change_version())
+    elif kwargs.get('update_fields') and 'change_version' not in kwargs['update_fields']:
+        # save(update_fields=...) skipped the version stamped in pre_save
+        sender.objects.filter(pk=instance.pk).update(change_version=instance.change_version)
+    version = bump_version(table)
+    geo_typeahead.record_change(table, instance, deleted=deleted, version=version)
@@ -0,0 +1,129 @@
+# master/snapshot.py
+
+import gzip
+import hashlib
+import json
+import threading
+
+from .cache import MASTER_TABLES, versions
+from .models import Country, State, City
+
+try:
+    import brotli
+except ImportError:  # Optional; gzip is always available
+    brotli = None
+
+
+def accepted_encodings(header):
+    """
+    Parses an Accept-Encoding header into the set of content codings the
+    client accepts. Codings with q=0 are refused, and '*' stands for the
+    compressed codings not listed explicitly.
+
+    :param header: The Accept-Encoding header value, e.g. 'gzip;q=0, br'
+    :return: Set of lowercased coding names
+    """
+    accepted, refused, wildcard = set(), set(), False
+    for item in header.split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        coding = coding.lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding == '*':
+            wildcard = quality > 0
+        elif quality > 0:
+            accepted.add(coding)
+        else:
+            refused.add(coding)
+    if wildcard:
+        accepted |= {'br', 'gzip'} - refused
+    return accepted
+
+
+class SnapshotBlob:
+    """
+    One serialized tree, kept both plain and compressed so a request only
+    copies bytes.
+    """
+
+    def __init__(self, data):
+        self.identity = json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        self.etag = '"%s"' % hashlib.md5(self.identity).hexdigest()
+        self.encoded = {'gzip': gzip.compress(self.identity, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            self.encoded['br'] = brotli.compress(self.identity, quality=11)
+
+    def body(self, accepted_encodings):
+        """
+        Returns (content, encoding) for the best encoding the client accepts,
+        preferring brotli; encoding is None for the plain JSON.
+        """
+        for encoding in ('br', 'gzip'):
+            if encoding in accepted_encodings and encoding in self.encoded:
+                return self.encoded[encoding], encoding
+        return self.identity, None
+
+
+class GeoSnapshot:
+    """
+    The Country -> State -> City tree, built with three flat queries and
+    serialized once per master data version.
+
+    The full tree is blob None; a country's subtree is built on first request
+    from the in-memory tree. Everything is dropped when any table's version
+    changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._countries = None  # country id -> country node
+        self._blobs = {}
+
+    def build_tree(self):
+        countries = {
+            pk: {'id': pk, 'name': name, 'code': code, 'states': []}
+            for pk, name, code in Country.objects.order_by('name', 'pk').values_list('id', 'name', 'code')
+        }
+        states = {}
+        for pk, name, country_id in State.objects.order_by('name', 'pk').values_list('id', 'name', 'country_id'):
+            # Rows committed between the queries can reference a parent not read yet; the next version rebuilds
+            if country_id in countries:
+                states[pk] = {'id': pk, 'name': name, 'cities': []}
+                countries[country_id]['states'].append(states[pk])
+        for pk, name, state_id in City.objects.order_by('name', 'pk').values_list('id', 'name', 'state_id').iterator():
+            if state_id in states:
+                states[state_id]['cities'].append({'id': pk, 'name': name})
+        return countries
+
+    def get(self, country=None):
+        """
+        Returns the SnapshotBlob for the whole tree, or for one country's
+        subtree; None if that country does not exist.
+        """
+        current = versions.get()
+        version = tuple(current[table][0] for table in MASTER_TABLES)
+        with self._lock:
+            if version != self._version:
+                self._countries = self.build_tree()
+                self._blobs = {}
+                self._version = version
+            if country not in self._blobs:
+                if country is None:
+                    self._blobs[None] = SnapshotBlob(list(self._countries.values()))
+                elif country in self._countries:
+                    self._blobs[country] = SnapshotBlob(self._countries[country])
+                else:
+                    return None
+            return self._blobs[country]
+
+
+geo_snapshot = GeoSnapshot()
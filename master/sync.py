@@ -0,0 +1,62 @@
+# master/sync.py
+
+from django.db.models import F
+
+from .models import Country, State, City, MasterDataVersion, MasterDataTombstone
+
+SYNC_COUNTER = 'sync'
+
+# table -> (model, response key, fields returned to sync clients)
+SYNC_TABLES = {
+    'country': (Country, 'countries', ('id', 'name', 'code')),
+    'state': (State, 'states', ('id', 'name', 'country')),
+    'city': (City, 'cities', ('id', 'name', 'state')),
+}
+
+
+def next_change_version():
+    """
+    Allocates the next global change version.
+
+    The counter row stays locked by the UPDATE until the caller's transaction
+    ends, so master data writers commit in version order: once a client has
+    seen version N, no row with a lower version can appear later. This holds
+    only if the stamped row is written in that same transaction; Country,
+    State and City save through ChangeVersionMixin for this, and importers
+    stamp and write each batch in one transaction.
+
+    :return: The new version
+    """
+    updated = MasterDataVersion.objects.filter(table=SYNC_COUNTER).update(version=F('version') + 1)
+    if not updated:
+        MasterDataVersion.objects.get_or_create(table=SYNC_COUNTER, defaults={'version': 1})
+    return MasterDataVersion.objects.filter(table=SYNC_COUNTER).values_list('version', flat=True).get()
+
+
+def current_change_version():
+    return MasterDataVersion.objects.filter(table=SYNC_COUNTER).values_list('version', flat=True).first() or 0
+
+
+def changes_since(since=None):
+    """
+    Returns the master data changed after `since`, or everything when since is None.
+
+    Rows are capped at the version read first, so a write committing while
+    this runs is reported by the next sync rather than half now.
+
+    :return: {'version': ..., 'countries'/'states'/'cities': [rows], 'deleted': {table: [ids]}}
+    """
+    version = current_change_version()
+    data = {'version': version, 'full': since is None, 'deleted': {}}
+    for table, (model, key, fields) in SYNC_TABLES.items():
+        queryset = model.objects.filter(change_version__lte=version)
+        if since is not None:
+            queryset = queryset.filter(change_version__gt=since)
+        data[key] = list(queryset.order_by('pk').values(*fields))
+        if since is not None:
+            data['deleted'][table] = list(
+                MasterDataTombstone.objects.filter(
+                    table=table, change_version__gt=since, change_version__lte=version
+                ).order_by('object_id').values_list('object_id', flat=True)
+            )
+    return data
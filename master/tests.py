@@ -0,0 +1,281 @@
+# master/tests.py
+
+from unittest import mock
+
+from django.db import IntegrityError, connection
+from django.db.models.functions import Length
+from django.db.models.signals import post_save
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from authuser.models import User
+from utils.pagination import KendoPagination
+from .cache import versions, response_cache
+from .fast_serializers import get_plan
+from .models import Country, State, City
+from .snapshot import accepted_encodings
+from .sync import changes_since, current_change_version
+
+
+class MasterDataTestCase(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.india = Country.objects.create(name='India', code='IN')
+        cls.nepal = Country.objects.create(name='Nepal', code='NP')
+        cls.goa = State.objects.create(name='Goa', country=cls.india)
+        cls.kerala = State.objects.create(name='Kerala', country=cls.india)
+        cls.bagmati = State.objects.create(name='Bagmati', country=cls.nepal)
+        for state, names in ((cls.goa, ['Panaji', 'Margao']), (cls.kerala, ['Kochi']), (cls.bagmati, ['Kathmandu'])):
+            for name in names:
+                City.objects.create(name=name, state=state)
+        cls.admin = User.objects.create_superuser(email='admin@example.com', password='Passw0rd!')
+        User.objects.filter(pk=cls.admin.pk).update(is_active=True)
+        cls.admin.is_active = True
+
+    def setUp(self):
+        self.reset_caches()
+
+    def reset_caches(self):
+        versions.invalidate()
+        response_cache.clear()
+
+
+class QueryBudgetTests(MasterDataTestCase):
+    """
+    The budgets in MASTER_QUERY_BUDGET hold on every auth path, with a cold
+    and a warm versions cache.
+    """
+    urls = [
+        '/api/master/countries/',
+        '/api/master/countries/{india}/',
+        '/api/master/states/',
+        '/api/master/states/{goa}/',
+        '/api/master/states/?sideload=true',
+        '/api/master/cities/',
+        '/api/master/cities/{goa}/',
+        '/api/master/cities/?sideload=true',
+        '/api/master/cities/?country={india}',
+        '/api/master/cities/?expand=none',
+        '/api/master/cities/?fields=id,name',
+        '/api/master/cities/?ids=1,2',
+        '/api/master/cities/?cursor=',
+    ]
+
+    def authenticate(self, auth):
+        self.client.logout()
+        self.client.cookies.clear()
+        if auth == 'session':
+            self.client.force_login(self.admin)
+        elif auth == 'jwt':
+            self.client.cookies['access'] = str(RefreshToken.for_user(self.admin).access_token)
+
+    def test_budgets(self):
+        for auth in ('anonymous', 'session', 'jwt'):
+            self.authenticate(auth)
+            for url in self.urls:
+                url = url.format(india=self.india.pk, goa=self.goa.pk)
+                for cold in (True, False):
+                    with self.subTest(auth=auth, url=url, cold=cold):
+                        if cold:
+                            self.reset_caches()
+                        response = self.client.get(url)
+                        self.assertEqual(response.status_code, 200)
+                        view = response.renderer_context['view']
+                        self.assertLessEqual(view.query_count, view.get_query_budget())
+
+    def test_sideload_budget(self):
+        response = self.client.get('/api/master/states/?sideload=true')
+        view = response.renderer_context['view']
+        self.assertEqual(view.get_query_budget(), view.query_budget['list'] + 1)
+        self.assertIn('included', response.data)
+
+
+class FastListTests(MasterDataTestCase):
+    """
+    FastListMixin renders the same bytes as the regular serializer path.
+    Orderings are total, as rows that tie may come back in either order.
+    """
+    queries = {
+        'countries': ['', '?fields=id,name', '?code=IN', '?ordering=-name', '?cursor=&take=1'],
+        'states': [
+            '', '?fields=id,name', '?fields=id,country', '?expand=none', '?country={india}',
+            '?expand=none&country={india}&ordering=-name', '?sideload=true', '?cursor=&take=2',
+        ],
+        'cities': [
+            '', '?fields=id,name', '?fields=name,state', '?expand=none', '?expand=none&fields=id,country',
+            '?country={india}', '?state={goa}', '?name=Kochi', '?ordering=state__name,name',
+            '?sideload=true', '?cursor=&take=2&ordering=-name',
+        ],
+    }
+
+    def get(self, url):
+        self.reset_caches()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.content
+
+    def test_same_output_as_serializer(self):
+        for table, queries in self.queries.items():
+            for query in queries:
+                url = f'/api/master/{table}/{query}'.format(india=self.india.pk, goa=self.goa.pk)
+                with self.subTest(url=url):
+                    with mock.patch('master.mixins.get_plan', wraps=get_plan) as plan:
+                        fast = self.get(url)
+                    # The fast path was taken for this request
+                    self.assertIsNotNone(get_plan(*plan.call_args.args))
+                    with mock.patch('master.mixins.get_plan', return_value=None):
+                        regular = self.get(url)
+                    self.assertEqual(fast, regular)
+
+
+class CursorPaginationTests(MasterDataTestCase):
+
+    def test_pages_follow_the_cursor(self):
+        names = []
+        url = '/api/master/cities/?cursor=&take=2&ordering=name'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            names += [row['name'] for row in response.data['results']]
+            cursor = response.data['nextCursor']
+            url = cursor and f'/api/master/cities/?cursor={cursor}&take=2&ordering=name'
+        self.assertEqual(names, ['Kathmandu', 'Kochi', 'Margao', 'Panaji'])
+
+    def test_search_pages_follow_the_cursor(self):
+        names = []
+        url = '/api/master/cities/?search=an&cursor=&take=1'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            names += [row['name'] for row in response.data['results']]
+            cursor = response.data['nextCursor']
+            url = cursor and f'/api/master/cities/?search=an&cursor={cursor}&take=1'
+        self.assertEqual(sorted(names), ['Kathmandu', 'Panaji'])
+
+    def test_annotation_ordering(self):
+        # As TrigramSearchFilter orders by its search_rank annotation on Postgres
+        queryset = City.objects.annotate(search_rank=Length('name')).order_by('-search_rank', 'pk')
+        names, cursor = [], ''
+        while cursor is not None:
+            paginator = KendoPagination()
+            request = Request(APIRequestFactory().get('/', {'cursor': cursor, 'take': 2}))
+            names += [city.name for city in paginator.paginate_queryset(queryset, request)]
+            cursor = paginator.next_cursor
+        self.assertEqual(names, list(queryset.values_list('name', flat=True)))
+
+        request = Request(APIRequestFactory().get('/', {'cursor': 'WyJhIiwgMV0='}))
+        with self.assertRaises(NotFound):
+            KendoPagination().paginate_queryset(queryset, request)
+
+    def test_invalid_cursor(self):
+        # Not base64, not JSON, the wrong number of values, a value of the wrong type
+        for cursor in ('%%%', 'bm90IGpzb24=', 'WzEsIDJd', 'WyJhIl0='):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(f'/api/master/cities/?cursor={cursor}')
+                self.assertEqual(response.status_code, 404)
+
+
+class ImportTests(MasterDataTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.admin)
+
+    def test_csv_import(self):
+        response = self.client.generic(
+            'POST', '/api/master/import/state/', b'name,country\nSikkim,IN\nGoa,India\n', content_type='text/csv'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['unchanged']), (1, 1))
+        self.assertTrue(State.objects.filter(name='Sikkim', country=self.india).exists())
+
+    def test_unreadable_input_is_reported_per_row(self):
+        cases = [
+            (b'name,country\nSikkim,IN\n\xff\xfe,x\n', 'text/csv', 3),
+            (b'name,country\nSikkim,IN\n' + b'x' * 200000 + b',IN\n', 'text/csv', 3),
+            (b'{"name": "Sikkim", "country": "IN"}\n\xff\xfe\n', 'application/x-ndjson', 2),
+        ]
+        for body, content_type, row in cases:
+            with self.subTest(body=body):
+                State.objects.filter(name='Sikkim').delete()
+                response = self.client.generic('POST', '/api/master/import/state/', body, content_type=content_type)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual((response.data['created'], response.data['failed']), (1, 1))
+                self.assertEqual(response.data['errors'][0]['row'], row)
+
+
+class ChangeVersionTests(TransactionTestCase):
+    """
+    Runs without a wrapping transaction, as requests do, so the version
+    counter and the row it is stamped on must commit together.
+    """
+
+    def test_sync_during_write(self):
+        india = Country.objects.create(name='India', code='IN')
+        seen = {}
+
+        def sync_while_in_flight(sender, instance, **kwargs):
+            seen['atomic'] = connection.in_atomic_block
+            seen['sync'] = changes_since(india.change_version)
+
+        post_save.connect(sync_while_in_flight, sender=State)
+        try:
+            goa = State.objects.create(name='Goa', country=india)
+        finally:
+            post_save.disconnect(sync_while_in_flight, sender=State)
+        # The row was written in the transaction that allocated its version
+        self.assertTrue(seen['atomic'])
+        self.assertEqual(seen['sync']['version'], goa.change_version)
+        self.assertEqual(changes_since(india.change_version)['states'], [{'id': goa.pk, 'name': 'Goa', 'country': india.pk}])
+
+    def test_failed_write_releases_version(self):
+        Country.objects.create(name='India', code='IN')
+        version = current_change_version()
+        with self.assertRaises(IntegrityError):
+            Country.objects.create(name='India', code='IN')
+        self.assertEqual(current_change_version(), version)
+
+
+class StateCountryTests(MasterDataTestCase):
+
+    def test_cities_follow_a_moved_state(self):
+        goa = State.objects.get(pk=self.goa.pk)
+        goa.country = self.nepal
+        goa.save()
+        self.assertEqual(set(City.objects.filter(state=goa).values_list('country_id', flat=True)), {self.nepal.pk})
+
+    def test_cities_untouched_when_country_unchanged(self):
+        goa = State.objects.get(pk=self.goa.pk)
+        goa.name = 'Goa State'
+        with CaptureQueriesContext(connection) as queries:
+            goa.save()
+        self.assertFalse([query for query in queries if 'master_city' in query['sql']])
+
+
+class SnapshotEncodingTests(MasterDataTestCase):
+
+    def test_accepted_encodings(self):
+        cases = [
+            ('', set()),
+            ('gzip, deflate, br', {'gzip', 'deflate', 'br'}),
+            ('gzip;q=0, br', {'br'}),
+            ('GZIP; q=0.5, br;q=0.0', {'gzip'}),
+            ('*', {'br', 'gzip'}),
+            ('*;q=1, gzip;q=0', {'br'}),
+            ('gzip;q=x', set()),
+        ]
+        for header, expected in cases:
+            with self.subTest(header=header):
+                self.assertEqual(accepted_encodings(header), expected)
+
+    def test_refused_gzip_is_not_sent(self):
+        response = self.client.get('/api/master/snapshot/', HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        response = self.client.get('/api/master/snapshot/', HTTP_ACCEPT_ENCODING='gzip;q=0.5')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
@@ -0,0 +1,195 @@
+# master/typeahead.py
+
+import threading
+from bisect import bisect_left, insort
+
+from django.db import transaction
+
+from .cache import MASTER_TABLES, versions
+from .models import Country, State, City
+
+
+def normalize(text):
+    return ' '.join(text.split()).casefold()
+
+
+class PrefixIndex:
+    """
+    Sorted (casefolded name, id) pairs. All names starting with a prefix form
+    one contiguous run, located with bisect.
+    """
+
+    def __init__(self, entries=()):
+        self._entries = sorted(entries)
+
+    def add(self, key, pk):
+        insort(self._entries, (key, pk))
+
+    def remove(self, key, pk):
+        index = bisect_left(self._entries, (key, pk))
+        if index < len(self._entries) and self._entries[index] == (key, pk):
+            del self._entries[index]
+
+    def search(self, prefix, limit):
+        """
+        Returns the ids of the first `limit` names starting with prefix, in name order.
+        """
+        results = []
+        # (prefix,) sorts before every (prefix..., id) pair
+        index = bisect_left(self._entries, (prefix,))
+        while index < len(self._entries) and len(results) < limit:
+            key, pk = self._entries[index]
+            if not key.startswith(prefix):
+                break
+            results.append(pk)
+            index += 1
+        return results
+
+
+class GeoTypeahead:
+    """
+    In-memory autocomplete over Country, State and City names.
+
+    Each table keeps its rows plus one PrefixIndex per scope: every row is in
+    the global index, states are also indexed per country and cities per
+    state and per country, so scoped lookups never scan other scopes.
+
+    Changes saved in this process are applied row by row after commit (see
+    master.signals). A table whose version moved on in a way this process did
+    not see, e.g. a write on another worker, is reloaded on the next lookup.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._built = {}  # table -> version the rows/indexes reflect
+        self._rows = {table: {} for table in MASTER_TABLES}
+        self._indexes = {table: {} for table in MASTER_TABLES}
+
+    @staticmethod
+    def scopes(table, row):
+        """
+        Index scopes a row belongs to; row is (name, ...parent ids).
+        """
+        if table == 'state':
+            return (None, ('country', row[1]))
+        if table == 'city':
+            return (None, ('state', row[1]), ('country', row[2]))
+        return (None,)
+
+    @staticmethod
+    def load(table):
+        if table == 'country':
+            queryset = Country.objects.values_list('id', 'name', 'code')
+        elif table == 'state':
+            queryset = State.objects.values_list('id', 'name', 'country_id')
+        else:
+            queryset = City.objects.values_list('id', 'name', 'state_id', 'country_id')
+        return {pk: tuple(row) for pk, *row in queryset.iterator()}
+
+    @staticmethod
+    def row_for(table, instance):
+        if table == 'country':
+            return (instance.name, instance.code)
+        if table == 'state':
+            return (instance.name, instance.country_id)
+        return (instance.name, instance.state_id, instance.country_id)
+
+    def _rebuild(self, table, version):
+        rows = self.load(table)
+        entries = {}
+        for pk, row in rows.items():
+            key = normalize(row[0])
+            for scope in self.scopes(table, row):
+                entries.setdefault(scope, []).append((key, pk))
+        self._rows[table] = rows
+        self._indexes[table] = {scope: PrefixIndex(pairs) for scope, pairs in entries.items()}
+        self._built[table] = version
+
+    def _sync(self):
+        current = versions.get()
+        for table in MASTER_TABLES:
+            if self._built.get(table) != current[table][0]:
+                self._rebuild(table, current[table][0])
+
+    def _unindex(self, table, pk):
+        row = self._rows[table].pop(pk, None)
+        if row is not None:
+            for scope in self.scopes(table, row):
+                self._indexes[table][scope].remove(normalize(row[0]), pk)
+        return row
+
+    def _index(self, table, pk, row):
+        self._rows[table][pk] = row
+        for scope in self.scopes(table, row):
+            self._indexes[table].setdefault(scope, PrefixIndex()).add(normalize(row[0]), pk)
+
+    def apply_change(self, table, pk, row, version):
+        """
+        Applies one saved (row) or deleted (row=None) record.
+
+        :param version: The table version the change produced; if it does not
+                        directly follow the indexed version, some other change
+                        was missed and the table is left for _sync() to reload
+        """
+        with self._lock:
+            if self._built.get(table) != version - 1:
+                return
+            old = self._unindex(table, pk)
+            if row is not None:
+                self._index(table, pk, row)
+            self._built[table] = version
+            if table == 'state' and old is not None and row is not None and old[1] != row[1]:
+                # Cities are also indexed by country, which just changed for this state's cities
+                self._built.pop('city', None)
+
+    def record_change(self, table, instance, deleted, version):
+        """
+        Queues an instance change from a post_save/post_delete handler for
+        when the surrounding transaction commits.
+        """
+        if table not in self._built:
+            return
+        row = None if deleted else self.row_for(table, instance)
+        pk = instance.pk
+        transaction.on_commit(lambda: self.apply_change(table, pk, row, version))
+
+    def search(self, table, prefix, limit, state=None, country=None):
+        """
+        Returns up to `limit` rows of `table` whose name starts with prefix,
+        optionally restricted to a state (cities) or country (states and cities).
+        """
+        if state is not None and table == 'city':
+            scope = ('state', state)
+        elif country is not None and table in ('state', 'city'):
+            scope = ('country', country)
+        else:
+            scope = None
+
+        with self._lock:
+            self._sync()
+            index = self._indexes[table].get(scope)
+            pks = index.search(normalize(prefix), limit) if index else []
+            return [self.describe(table, pk) for pk in pks]
+
+    def name_of(self, table, pk):
+        # A parent changed on another worker may not be reloaded yet
+        row = self._rows[table].get(pk)
+        return row[0] if row else None
+
+    def describe(self, table, pk):
+        row = self._rows[table][pk]
+        if table == 'country':
+            return {'id': pk, 'name': row[0], 'code': row[1]}
+        if table == 'state':
+            return {'id': pk, 'name': row[0], 'country': row[1], 'country_name': self.name_of('country', row[1])}
+        return {
+            'id': pk,
+            'name': row[0],
+            'state': row[1],
+            'state_name': self.name_of('state', row[1]),
+            'country': row[2],
+            'country_name': self.name_of('country', row[2]),
+        }
+
+
+geo_typeahead = GeoTypeahead()
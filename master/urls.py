@@ -2,7 +2,7 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CountryViewSet, StateViewSet, CityViewSet
+from .views import CountryViewSet, StateViewSet, CityViewSet, GeoAutocompleteView, GeoSnapshotView, MasterSyncView, MasterImportView
 
 router = DefaultRouter()
 router.register(r'countries', CountryViewSet, basename='country')
@@ -10,5 +10,9 @@ router.register(r'states', StateViewSet, basename='state')
 router.register(r'cities', CityViewSet, basename='city')
 
 urlpatterns = [
+    path('autocomplete/', GeoAutocompleteView.as_view(), name='geo-autocomplete'),
+    path('snapshot/', GeoSnapshotView.as_view(), name='geo-snapshot'),
+    path('sync/', MasterSyncView.as_view(), name='master-sync'),
+    path('import/<str:table>/', MasterImportView.as_view(), name='master-import'),
     path('', include(router.urls)),
 ]
@@ -1,34 +1,189 @@
 # master/views.py
 
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
 from rest_framework import viewsets, filters
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Country, State, City
-from .serializers import CountrySerializer, StateSerializer, CitySerializer
+from .serializers import (
+    CountrySerializer,
+    StateSerializer,
+    CitySerializer,
+    FlatStateSerializer,
+    FlatCitySerializer,
+)
 from .permissions import CustomModelPermission
+from .mixins import MasterDataCacheMixin, FlatExpandMixin, MultiGetMixin, FastListMixin, SideloadMixin
+from .search import TrigramSearchFilter
+from .typeahead import geo_typeahead
+from .snapshot import accepted_encodings, geo_snapshot
+from .sync import changes_since
+from .importer import IMPORTERS, detect_format, import_master_data
+from .cache import MASTER_TABLES
+from utils.mixins import QueryBudgetMixin, SparseFieldsetQuerysetMixin
 
-class CountryViewSet(viewsets.ModelViewSet):
-    queryset = Country.objects.all()
+# Handler queries only (auth is not counted): versions (on cache refresh) + count + page,
+# plus the lookup of a filtered parent (e.g. ?country=)
+MASTER_QUERY_BUDGET = {'list': 4, 'retrieve': 2}
+
+class CountryViewSet(QueryBudgetMixin, MasterDataCacheMixin, MultiGetMixin, FastListMixin, SparseFieldsetQuerysetMixin, viewsets.ModelViewSet):
+    # pk ordering keeps offset pages stable; OrderingFilter and search ranking replace it
+    queryset = Country.objects.order_by('pk')
     serializer_class = CountrySerializer
     permission_classes = [CustomModelPermission]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, TrigramSearchFilter, filters.OrderingFilter]
     filterset_fields = ['name', 'code']
     search_fields = ['name', 'code']
     ordering_fields = ['name', 'code']
+    cache_tables = ('country',)
+    query_budget = MASTER_QUERY_BUDGET
+    pagination_total_strategy = 'cached'
 
-class StateViewSet(viewsets.ModelViewSet):
-    queryset = State.objects.all()
+class StateViewSet(QueryBudgetMixin, MasterDataCacheMixin, SideloadMixin, MultiGetMixin, FastListMixin, SparseFieldsetQuerysetMixin, FlatExpandMixin, viewsets.ModelViewSet):
+    queryset = State.objects.select_related('country').order_by('pk')
+    flat_queryset = State.objects.order_by('pk')
     serializer_class = StateSerializer
+    flat_serializer_class = FlatStateSerializer
     permission_classes = [CustomModelPermission]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, TrigramSearchFilter, filters.OrderingFilter]
     filterset_fields = ['name', 'country']
     search_fields = ['name', 'country__name']
     ordering_fields = ['name', 'country__name']
+    cache_tables = ('state', 'country')
+    sideload = (('country', 'countries', Country, ('id', 'name', 'code')),)
+    query_budget = MASTER_QUERY_BUDGET
+    pagination_total_strategy = 'cached'
 
-class CityViewSet(viewsets.ModelViewSet):
-    queryset = City.objects.all()
+class CityViewSet(QueryBudgetMixin, MasterDataCacheMixin, SideloadMixin, MultiGetMixin, FastListMixin, SparseFieldsetQuerysetMixin, FlatExpandMixin, viewsets.ModelViewSet):
+    queryset = City.objects.select_related('state__country').order_by('pk')
+    flat_queryset = City.objects.order_by('pk')
     serializer_class = CitySerializer
+    flat_serializer_class = FlatCitySerializer
     permission_classes = [CustomModelPermission]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['name', 'state']
+    filter_backends = [DjangoFilterBackend, TrigramSearchFilter, filters.OrderingFilter]
+    # country filters on City's own country_id, without joining State
+    filterset_fields = ['name', 'state', 'country']
     search_fields = ['name', 'state__name']
     ordering_fields = ['name', 'state__name']
+    cache_tables = ('city', 'state', 'country')
+    sideload = (
+        ('state', 'states', State, ('id', 'name', 'country')),
+        ('country', 'countries', Country, ('id', 'name', 'code')),
+    )
+    query_budget = MASTER_QUERY_BUDGET
+    pagination_total_strategy = 'cached'
+
+class GeoAutocompleteView(APIView):
+    """
+    Prefix autocomplete for address forms, answered from the in-memory
+    typeahead index instead of a search query per keystroke.
+
+    ?q=<prefix>&type=city|state|country (default city)
+    &state=<id> (cities) / &country=<id> (states, cities) &limit=<n>
+    """
+    permission_classes = [CustomModelPermission]
+
+    def get_int_param(self, name):
+        value = self.request.query_params.get(name)
+        if value in (None, ''):
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            raise ValidationError({name: "A valid integer is required."})
+
+    def get(self, request, *args, **kwargs):
+        table = request.query_params.get('type', 'city')
+        if table not in ('city', 'state', 'country'):
+            raise ValidationError({'type': "Must be one of: city, state, country."})
+        limit = self.get_int_param('limit') or settings.MASTER_TYPEAHEAD_DEFAULT_LIMIT
+        limit = max(1, min(limit, settings.MASTER_TYPEAHEAD_MAX_LIMIT))
+
+        results = geo_typeahead.search(
+            table,
+            request.query_params.get('q', ''),
+            limit,
+            state=self.get_int_param('state'),
+            country=self.get_int_param('country'),
+        )
+        return Response({'results': results})
+
+class GeoSnapshotView(MasterDataCacheMixin, APIView):
+    """
+    The whole Country -> State -> City tree in one response, or one country's
+    subtree with ?country=<id>. The JSON is built and compressed once per
+    master data version and served as stored bytes.
+    """
+    permission_classes = [CustomModelPermission]
+    cache_tables = MASTER_TABLES
+
+    def get(self, request, *args, **kwargs):
+        country = request.query_params.get('country')
+        if country:
+            try:
+                country = int(country)
+            except ValueError:
+                raise ValidationError({'country': "A valid integer is required."})
+        blob = geo_snapshot.get(country or None)
+        if blob is None:
+            raise NotFound("Country not found.")
+
+        last_modified = self.get_last_modified()
+        not_modified = get_conditional_response(request, etag=blob.etag, last_modified=last_modified)
+        if not_modified is not None:
+            response = not_modified
+        else:
+            content, encoding = blob.body(accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+            response = HttpResponse(content, content_type='application/json')
+            if encoding:
+                response['Content-Encoding'] = encoding
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return self.set_validators(response, blob.etag, last_modified)
+
+class MasterSyncView(APIView):
+    """
+    Delta sync for clients holding a local copy of master data.
+
+    ?since=<version> returns only rows stamped after that version plus the
+    ids deleted since, and the version to pass next time. Without since,
+    every row is returned ('full': true).
+    """
+    permission_classes = [CustomModelPermission]
+
+    def get(self, request, *args, **kwargs):
+        since = request.query_params.get('since')
+        if since not in (None, ''):
+            try:
+                since = int(since)
+            except ValueError:
+                raise ValidationError({'since': "A valid integer is required."})
+        else:
+            since = None
+        return Response(changes_since(since))
+
+class MasterImportView(APIView):
+    """
+    Bulk upsert of one master table from CSV (with a header row) or JSON Lines.
+
+    Send the file as multipart field 'file', or as the raw request body with a
+    text/csv or application/x-ndjson Content-Type. The input is streamed, so
+    large files are never held in memory at once.
+    """
+    permission_classes = [CustomModelPermission]
+
+    def post(self, request, table, *args, **kwargs):
+        if table not in IMPORTERS:
+            raise NotFound("Unknown master table.")
+        if request.content_type.startswith('multipart/'):
+            upload = request.FILES.get('file')
+            if upload is None:
+                raise ValidationError({'file': "No file was submitted."})
+            stream, file_format = upload, detect_format(upload.name)
+        else:
+            # The underlying HttpRequest is read line by line instead of being parsed into request.data
+            stream, file_format = request._request, detect_format(request.content_type)
+        return Response(import_master_data(table, stream, file_format))
@@ -1,6 +1,7 @@
 # utils/admin.py
 
 from django.contrib import admin
-from .models import OTP
+from .models import OTP, NotificationOutbox
 
 admin.site.register(OTP)
+admin.site.register(NotificationOutbox)
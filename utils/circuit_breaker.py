@@ -0,0 +1,71 @@
+# utils/circuit_breaker.py
+
+import threading
+import time
+
+from . import metrics
+
+
+class CircuitBreaker:
+    """
+    Process-local circuit breaker for calls to an external provider.
+
+    - closed: calls go through; consecutive failures are counted
+    - open: calls fail fast until reset_timeout seconds have passed
+    - half_open: a single trial call is let through; success closes the
+      circuit, failure re-opens it
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def allow_request(self):
+        """
+        Returns True if a call may be attempted right now.
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                metrics.increment(f'{self.name}.circuit_closed')
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    metrics.increment(f'{self.name}.circuit_opened')
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
@@ -0,0 +1,57 @@
+# utils/db.py
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, transaction
+from django.db.models import sql
+
+
+def update_returning(queryset, returning, **values):
+    """
+    Runs queryset.update(**values) and returns the updated rows.
+
+    Where the database supports it (PostgreSQL, SQLite 3.35+) this is a single
+    UPDATE ... RETURNING, so conditional updates and F() counters come back
+    without a second round trip. Elsewhere the rows are locked with
+    select_for_update(), updated and read back in one transaction.
+
+    Only filters on the queryset's own table are supported.
+
+    :param returning: Field names to return
+    :param values: Same as for QuerySet.update()
+    :return: List of dicts keyed by the returned field names
+    """
+    connection = connections[queryset.db]
+    meta = queryset.model._meta
+
+    if not connection.features.can_return_columns_from_insert:
+        with transaction.atomic(using=queryset.db):
+            pks = list(queryset.select_for_update().values_list('pk', flat=True))
+            if not pks:
+                return []
+            rows = queryset.model._default_manager.using(queryset.db).filter(pk__in=pks)
+            rows.update(**values)
+            return list(rows.values(*returning))
+
+    query = queryset.query.chain(sql.UpdateQuery)
+    query.add_update_values(values)
+    query.annotations = {}
+    compiler = query.get_compiler(queryset.db)
+    try:
+        update_sql, params = compiler.as_sql()
+    except EmptyResultSet:
+        return []
+    if not update_sql:
+        return []
+
+    fields = [meta.get_field(name) for name in returning]
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+    expressions = [field.get_col(meta.db_table) for field in fields]
+    converters = compiler.get_converters(expressions)
+
+    with transaction.mark_for_rollback_on_error(using=queryset.db):
+        with connection.cursor() as cursor:
+            cursor.execute(f"{update_sql} RETURNING {columns}", params)
+            rows = cursor.fetchall()
+    if converters:
+        rows = compiler.apply_converters(rows, converters)
+    return [dict(zip(returning, row)) for row in rows]
@@ -0,0 +1,61 @@
+# utils/dispatch.py
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+
+# Initialize logger
+logger = logging.getLogger('authuser')  # Use the appropriate logger
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.NOTIFICATION_DISPATCH_WORKERS,
+                    thread_name_prefix='notify-dispatch',
+                )
+    return _executor
+
+
+def dispatch_concurrently(tasks, deadline=None):
+    """
+    Runs provider calls in parallel on a bounded, process-wide thread pool.
+
+    The whole fan-out shares a single deadline: once it passes, the request
+    stops waiting and any unfinished task is reported as 'timeout' (the call
+    itself keeps running in the pool and may still be delivered).
+
+    :param tasks: Dict mapping a channel name to a zero-argument callable
+                  returning True on success
+    :param deadline: Total seconds to wait (default: NOTIFICATION_DISPATCH_DEADLINE_SECONDS)
+    :return: Dict mapping each channel to 'sent', 'failed' or 'timeout'
+    """
+    if deadline is None:
+        deadline = settings.NOTIFICATION_DISPATCH_DEADLINE_SECONDS
+
+    started = time.monotonic()
+    futures = {channel: _get_executor().submit(task) for channel, task in tasks.items()}
+    wait(futures.values(), timeout=deadline)
+
+    results = {}
+    for channel, future in futures.items():
+        if not future.done():
+            results[channel] = 'timeout'
+            logger.warning(f"{channel} dispatch exceeded the {deadline}s deadline.")
+        elif future.exception() is not None:
+            results[channel] = 'failed'
+            logger.error(f"{channel} dispatch raised: {future.exception()}")
+        else:
+            results[channel] = 'sent' if future.result() else 'failed'
+
+    logger.debug(f"Dispatched {', '.join(tasks)} in {time.monotonic() - started:.3f}s: {results}")
+    return results
@@ -1,13 +1,77 @@
 # utils/email_utils.py
 
 import logging
+import threading
 from django.conf import settings
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
+from sendgrid.helpers.mail import Mail, Personalization, To, Substitution
+
+from .http import build_session
 
 # Initialize logger
 logger = logging.getLogger('authuser')  # Use the appropriate logger
 
+SENDGRID_SEND_URL = 'https://api.sendgrid.com/v3/mail/send'
+SENDGRID_MAX_PERSONALIZATIONS = 1000  # Provider limit per /mail/send call
+
+_client = None
+_client_lock = threading.Lock()
+
+
+class SendGridError(Exception):
+    """
+    Raised when SendGrid rejects a /mail/send request.
+    """
+
+    def __init__(self, status_code, body):
+        super().__init__(f"SendGrid returned {status_code}: {body}")
+        self.status_code = status_code
+        self.body = body
+
+
+class SendGridClient:
+    """
+    Minimal SendGrid v3 client over a pooled keep-alive session.
+
+    The official SendGridAPIClient opens a new connection per request; this
+    client reuses connections across sends, which matters for OTP bursts and
+    bulk mailings.
+    """
+
+    def __init__(self, api_key, pool_maxsize=10):
+        self.session = build_session(
+            pool_maxsize=pool_maxsize,
+            headers={
+                'Authorization': f'Bearer {api_key}',
+                'Content-Type': 'application/json',
+            },
+        )
+
+    def send(self, message):
+        """
+        Sends a sendgrid.helpers.mail.Mail object.
+
+        :return: The requests Response (202 on success)
+        :raises SendGridError: If SendGrid rejects the request
+        """
+        timeout = (settings.SENDGRID_CONNECT_TIMEOUT, settings.SENDGRID_READ_TIMEOUT)
+        response = self.session.post(SENDGRID_SEND_URL, json=message.get(), timeout=timeout)
+        if response.status_code >= 400:
+            raise SendGridError(response.status_code, response.text)
+        return response
+
+
+def get_sendgrid_client():
+    """
+    Returns the process-wide SendGrid client, creating it on first use.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = SendGridClient(settings.SENDGRID_API_KEY, pool_maxsize=settings.SENDGRID_POOL_SIZE)
+    return _client
+
+
 def send_custom_email(subject, html_content, recipient_list, from_email=None, fail_silently=False):
     """
     Sends a custom email using SendGrid.
@@ -30,8 +94,7 @@ def send_custom_email(subject, html_content, recipient_list, from_email=None, fa
     )
 
     try:
-        sg = SendGridAPIClient(settings.SENDGRID_API_KEY)
-        response = sg.send(message)
+        response = get_sendgrid_client().send(message)
         logger.info(
             f"Email sent successfully to {', '.join(recipient_list)} with subject '{subject}'. "
             f"Status Code: {response.status_code}"
@@ -43,3 +106,50 @@ def send_custom_email(subject, html_content, recipient_list, from_email=None, fa
         )
         if not fail_silently:
             raise e
+
+
+def send_bulk_email(subject, html_content, recipients, from_email=None, fail_silently=False):
+    """
+    Sends the same email to many recipients with as few SendGrid calls as possible.
+
+    Recipients are packed SENDGRID_MAX_PERSONALIZATIONS at a time into one
+    request, each in its own personalization so nobody sees the other
+    addresses. Per-recipient substitutions replace tokens in the subject and
+    HTML content (e.g. {'-first_name-': 'Asha'}).
+
+    :param subject: Subject of the email
+    :param html_content: HTML content of the email
+    :param recipients: Iterable of email addresses or (email, substitutions) pairs
+    :param from_email: Sender's email address (optional)
+    :param fail_silently: If True, log failed batches and continue
+    :return: Number of recipients accepted by SendGrid
+    """
+    if from_email is None:
+        from_email = settings.DEFAULT_FROM_EMAIL
+
+    recipients = [r if isinstance(r, tuple) else (r, None) for r in recipients]
+    accepted = 0
+    for start in range(0, len(recipients), SENDGRID_MAX_PERSONALIZATIONS):
+        batch = recipients[start:start + SENDGRID_MAX_PERSONALIZATIONS]
+        message = Mail(from_email=from_email, subject=subject, html_content=html_content)
+        for index, (email, substitutions) in enumerate(batch):
+            personalization = Personalization()
+            personalization.add_to(To(email))
+            for key, value in (substitutions or {}).items():
+                personalization.add_substitution(Substitution(key, str(value)))
+            message.add_personalization(personalization, index=index)
+
+        try:
+            response = get_sendgrid_client().send(message)
+            accepted += len(batch)
+            logger.info(
+                f"Bulk email '{subject}' sent to {len(batch)} recipients. Status Code: {response.status_code}"
+            )
+        except Exception as e:
+            logger.error(
+                f"Failed to send bulk email '{subject}' to {len(batch)} recipients: {str(e)}",
+                exc_info=True
+            )
+            if not fail_silently:
+                raise e
+    return accepted
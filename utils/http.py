@@ -0,0 +1,25 @@
+# utils/http.py
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def build_session(pool_maxsize=10, headers=None):
+    """
+    Builds a requests Session backed by a keep-alive connection pool.
+
+    Sessions are meant to be created once per process and shared, so that
+    repeated calls to the same provider reuse TCP/TLS connections instead of
+    paying a fresh handshake on every request.
+
+    :param pool_maxsize: Maximum number of pooled connections per host
+    :param headers: Default headers sent with every request (optional)
+    :return: A configured requests.Session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
@@ -0,0 +1,114 @@
+# utils/login_attempts.py
+
+import logging
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db.models import Case, DateTimeField, F, Q, Value, When
+from django.utils import timezone
+
+from .db import update_returning
+
+logger = logging.getLogger('authuser')
+
+User = get_user_model()
+
+
+def failure_key(user_id):
+    return f'login:failures:{user_id}'
+
+
+def lock_duration():
+    return timezone.timedelta(hours=settings.LOGIN_LOCK_DURATION_HOURS)
+
+
+def record_failed_login(user):
+    """
+    Counts a failed login and locks the account for LOGIN_LOCK_DURATION_HOURS
+    once MAX_LOGIN_ATTEMPTS is reached. Failures while the account is locked
+    are not counted; after the lock has passed the count starts over.
+
+    With LOGIN_FAILURE_COUNTER='cache' the count is kept in the cache and the
+    user row is only written when the lock is set.
+
+    :return: Tuple of (failed attempts, lock_until or None)
+    """
+    if settings.LOGIN_FAILURE_COUNTER == 'cache':
+        attempts, lock_until = record_in_cache(user)
+    else:
+        attempts, lock_until = record_in_database(user)
+    user.failed_login_attempts = attempts
+    user.lock_until = lock_until
+    return attempts, lock_until
+
+
+def record_in_database(user):
+    """
+    One conditional UPDATE ... RETURNING: concurrent failures are all counted
+    and only the password check itself runs outside the statement.
+    """
+    now = timezone.now()
+    lock_until = now + lock_duration()
+    max_attempts = settings.MAX_LOGIN_ATTEMPTS
+    lock_expired = Q(lock_until__lte=now)
+
+    rows = update_returning(
+        User.objects.filter(pk=user.pk).exclude(lock_until__gt=now),
+        ['failed_login_attempts', 'lock_until'],
+        failed_login_attempts=Case(
+            When(lock_expired, then=Value(1)),
+            default=F('failed_login_attempts') + 1,
+        ),
+        lock_until=Case(
+            When(lock_expired, then=Value(lock_until if max_attempts <= 1 else None)),
+            When(failed_login_attempts__gte=max_attempts - 1, then=Value(lock_until)),
+            default=Value(None),
+            output_field=DateTimeField(),
+        ),
+    )
+    if rows:
+        return rows[0]['failed_login_attempts'], rows[0]['lock_until']
+
+    # A concurrent request locked the account after it was loaded
+    return max_attempts, User.objects.filter(pk=user.pk).values_list('lock_until', flat=True).first()
+
+
+def record_in_cache(user):
+    """
+    Counts with cache.incr(), which is atomic on Redis and memcached; the key
+    expires after LOGIN_LOCK_DURATION_HOURS without failures.
+    """
+    cache = caches[settings.LOGIN_FAILURE_CACHE_ALIAS]
+    key = failure_key(user.pk)
+    timeout = int(lock_duration().total_seconds())
+    cache.add(key, 0, timeout)
+    try:
+        attempts = cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, 1, timeout)
+        attempts = 1
+    if attempts < settings.MAX_LOGIN_ATTEMPTS:
+        return attempts, None
+
+    now = timezone.now()
+    lock_until = now + lock_duration()
+    User.objects.filter(pk=user.pk).exclude(lock_until__gt=now).update(
+        failed_login_attempts=attempts, lock_until=lock_until
+    )
+    cache.delete(key)
+    return attempts, lock_until
+
+
+def reset_failed_logins(user):
+    """
+    Clears the failure count after a successful login. Writes the user row
+    only when there is something to clear.
+    """
+    if settings.LOGIN_FAILURE_COUNTER == 'cache':
+        caches[settings.LOGIN_FAILURE_CACHE_ALIAS].delete(failure_key(user.pk))
+    if user.failed_login_attempts or user.lock_until:
+        User.objects.filter(pk=user.pk).update(failed_login_attempts=0, lock_until=None)
+        user.failed_login_attempts = 0
+        user.lock_until = None
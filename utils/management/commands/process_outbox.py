@@ -0,0 +1,34 @@
+# utils/management/commands/process_outbox.py
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from utils.notifications import drain_outbox
+
+
+class Command(BaseCommand):
+    help = "Delivers queued email/SMS notifications from the outbox, retrying failures with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE,
+                            help="Maximum number of rows claimed per batch.")
+        parser.add_argument('--once', action='store_true',
+                            help="Drain the currently due rows and exit instead of polling forever.")
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help="Seconds to sleep when the outbox has nothing due.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        while True:
+            sent, retried, failed = drain_outbox(batch_size)
+            processed = sent + retried + failed
+            if processed:
+                self.stdout.write(f"Processed {processed} notifications: {sent} sent, {retried} retried, {failed} failed.")
+
+            # A full batch means more rows are probably due; keep draining without sleeping.
+            if processed < batch_size:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
@@ -0,0 +1,43 @@
+# utils/management/commands/purge_otps.py
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from utils.notifications import purge_outbox
+from utils.otp_store import purge_expired
+
+
+class Command(BaseCommand):
+    help = ("Deletes expired OTP rows, and sent or failed outbox notifications (which hold OTPs), "
+            "older than their retention periods in small batches.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', type=int, default=settings.OTP_RETENTION_DAYS,
+                            help="Keep rows that expired less than this many days ago.")
+        parser.add_argument('--outbox-retention-days', type=int, default=settings.OUTBOX_RETENTION_DAYS,
+                            help="Keep sent or failed outbox rows created less than this many days ago.")
+        parser.add_argument('--batch-size', type=int, default=settings.OTP_PURGE_BATCH_SIZE,
+                            help="Maximum number of rows deleted per batch.")
+        parser.add_argument('--sleep', type=float, default=0.0,
+                            help="Seconds to pause between batches to leave room for other writers.")
+
+    def purge(self, batches, options):
+        total = 0
+        for deleted in batches:
+            total += deleted
+            if options['sleep']:
+                time.sleep(options['sleep'])
+        return total
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        cutoff = now - timezone.timedelta(days=options['retention_days'])
+        total = self.purge(purge_expired(cutoff, options['batch_size']), options)
+        self.stdout.write(f"Deleted {total} expired OTP rows.")
+
+        cutoff = now - timezone.timedelta(days=options['outbox_retention_days'])
+        total = self.purge(purge_outbox(cutoff, options['batch_size']), options)
+        self.stdout.write(f"Deleted {total} outbox rows.")
@@ -0,0 +1,58 @@
+# utils/metrics.py
+
+import threading
+from collections import defaultdict
+
+# Process-local counters and timings. Each worker keeps its own figures; the
+# scraper is expected to aggregate across workers.
+_lock = threading.Lock()
+_counters = defaultdict(int)
+_timings = {}
+
+
+def increment(name, value=1):
+    """
+    Increments a named counter.
+
+    :param name: Dotted counter name (e.g., 'recaptcha.success')
+    :param value: Amount to add (default is 1)
+    """
+    with _lock:
+        _counters[name] += value
+
+
+def observe(name, seconds):
+    """
+    Records a latency observation for a named timing.
+
+    :param name: Dotted timing name (e.g., 'recaptcha.latency')
+    :param seconds: Observed duration in seconds
+    """
+    with _lock:
+        timing = _timings.get(name)
+        if timing is None:
+            _timings[name] = [1, seconds, seconds]
+        else:
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+
+
+def snapshot():
+    """
+    Returns a point-in-time copy of all counters and timings.
+
+    :return: Dict with 'counters' and 'timings' sections
+    """
+    with _lock:
+        counters = dict(_counters)
+        timings = {
+            name: {
+                'count': count,
+                'total_seconds': round(total, 6),
+                'avg_seconds': round(total / count, 6),
+                'max_seconds': round(maximum, 6),
+            }
+            for name, (count, total, maximum) in _timings.items()
+        }
+    return {'counters': counters, 'timings': timings}
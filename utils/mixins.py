@@ -0,0 +1,101 @@
+# utils/mixins.py
+
+import logging
+
+from django.db import connection
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class QueryBudgetMixin:
+    """
+    Counts the SQL queries issued by the handler of a request and flags
+    views that exceed query_budget for the current action, which is how N+1
+    regressions show up.
+
+    Queries made before the handler runs (authentication, permissions,
+    throttles) depend on the auth path and are not counted. Over-budget
+    requests are logged and counted in the 'query_budget.exceeded' metric;
+    the response is always returned. Tests assert the budgets strictly.
+
+    Handlers that add a known number of queries for an opt-in feature (e.g.
+    ?sideload=true) raise extra_query_budget for the request.
+    """
+    query_budget = {}
+    extra_query_budget = 0
+
+    def get_query_budget(self):
+        budget = self.query_budget.get(getattr(self, 'action', None))
+        if budget is None:
+            return None
+        return budget + self.extra_query_budget
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._queries_before_handler = self._query_counter.count
+
+    def dispatch(self, request, *args, **kwargs):
+        self._query_counter = counter = _QueryCounter()
+        self._queries_before_handler = 0
+        self.extra_query_budget = 0
+        with connection.execute_wrapper(counter):
+            response = super().dispatch(request, *args, **kwargs)
+
+        self.query_count = counter.count - self._queries_before_handler
+        budget = self.get_query_budget()
+        if budget is not None and self.query_count > budget:
+            metrics.increment('query_budget.exceeded')
+            logger.warning(
+                f"{type(self).__name__}.{self.action} issued {self.query_count} queries "
+                f"(budget {budget}) for {request.get_full_path()}"
+            )
+        return response
+
+
+class SparseFieldsetQuerysetMixin:
+    """
+    Carries a serializer's ?fields=/?omit= restriction (see
+    utils.serializers.SparseFieldsetMixin) down to the query with .only(),
+    so unused columns are not fetched. Related models that are no longer
+    serialized are dropped from select_related().
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method != 'GET':
+            return queryset
+        params = self.request.query_params
+        if not params.get('fields') and not params.get('omit'):
+            return queryset
+
+        serializer = self.get_serializer()
+        get_columns = getattr(serializer, 'get_model_columns', None)
+        columns = get_columns() if get_columns else None
+        if not columns:
+            return queryset
+
+        related = queryset.query.select_related
+        if isinstance(related, dict):
+            kept = [name for name in related if name in columns]
+            paths = [path for name in kept for path in _select_related_paths(name, related[name])]
+            queryset = queryset.select_related(None)
+            if paths:
+                queryset = queryset.select_related(*paths)
+        return queryset.only(*columns)
+
+
+def _select_related_paths(prefix, tree):
+    if not tree:
+        return [prefix]
+    return [path for name, subtree in tree.items() for path in _select_related_paths(f'{prefix}__{name}', subtree)]
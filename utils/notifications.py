@@ -0,0 +1,186 @@
+# utils/notifications.py
+
+import logging
+import random
+from collections import namedtuple
+from contextlib import nullcontext
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .dispatch import dispatch_concurrently
+from .email_utils import send_custom_email
+from .models import NotificationOutbox
+from .sms_otp_utils import send_otp_sms
+
+# Initialize logger
+logger = logging.getLogger('authuser')  # Use the appropriate logger
+
+Notification = namedtuple('Notification', ['channel', 'recipient', 'subject', 'body', 'campaign_name'])
+
+
+def email_notification(subject, html_content, recipient):
+    """
+    Describes an email to be delivered through notify().
+
+    :param subject: Subject of the email
+    :param html_content: HTML content of the email
+    :param recipient: Recipient email address
+    """
+    return Notification('email', recipient, subject, html_content, '')
+
+
+def sms_notification(destination, otp_code, campaign_name="otp_verification"):
+    """
+    Describes an OTP SMS to be delivered through notify().
+
+    :param destination: The recipient's mobile number with country code
+    :param otp_code: The OTP code to send
+    :param campaign_name: The campaign name for the SMS (default: "otp_verification")
+    """
+    return Notification('sms', destination, '', otp_code, campaign_name)
+
+
+def uses_outbox():
+    return settings.NOTIFICATION_DELIVERY_MODE == 'outbox'
+
+
+def notification_atomic():
+    """
+    Transaction to wrap around the OTP write and the notify() call.
+
+    In outbox mode the OTP row and its outbox rows commit together. In sync
+    mode no transaction is opened, so provider calls never hold one open.
+    """
+    return transaction.atomic() if uses_outbox() else nullcontext()
+
+
+def notify(*notifications):
+    """
+    Queues notifications in the outbox, or sends them inline in sync mode.
+
+    In sync mode all channels are sent concurrently under one deadline (see
+    utils.dispatch). None entries are ignored, so callers can pass conditional
+    notifications.
+
+    :return: Dict mapping each channel to 'queued', 'sent', 'failed' or 'timeout'
+    """
+    notifications = [n for n in notifications if n is not None]
+    if uses_outbox():
+        NotificationOutbox.objects.bulk_create([
+            NotificationOutbox(
+                channel=n.channel,
+                recipient=n.recipient,
+                subject=n.subject,
+                body=n.body,
+                campaign_name=n.campaign_name,
+            )
+            for n in notifications
+        ])
+        return {n.channel: 'queued' for n in notifications}
+
+    # Sync mode: send every channel at once so the provider round trips overlap
+    return dispatch_concurrently({n.channel: partial(deliver, n) for n in notifications})
+
+
+def deliver(notification):
+    """
+    Sends a single notification through its provider.
+
+    :return: Boolean indicating if the provider accepted the message
+    """
+    if notification.channel == 'email':
+        try:
+            send_custom_email(notification.subject, notification.body, [notification.recipient])
+        except Exception:
+            return False
+        return True
+    return send_otp_sms(notification.recipient, notification.body, campaign_name=notification.campaign_name)
+
+
+def retry_delay(attempts):
+    """
+    Exponential backoff with jitter for the given number of failed attempts.
+    """
+    delay = min(settings.OUTBOX_RETRY_BASE_SECONDS * (2 ** (attempts - 1)), settings.OUTBOX_RETRY_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+def claim_batch(batch_size):
+    """
+    Claims up to batch_size due outbox rows for this worker.
+
+    Rows are locked with SKIP LOCKED so concurrent workers never claim the same
+    row, and their next_attempt_at is pushed out by OUTBOX_LEASE_SECONDS so a
+    worker that dies mid-batch only delays delivery instead of losing it.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        entries = list(
+            NotificationOutbox.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        if entries:
+            NotificationOutbox.objects.filter(pk__in=[e.pk for e in entries]).update(
+                next_attempt_at=now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+            )
+    return entries
+
+
+def drain_outbox(batch_size=None):
+    """
+    Delivers one batch of due outbox rows.
+
+    :param batch_size: Maximum rows to process (default: OUTBOX_BATCH_SIZE)
+    :return: Tuple of (sent, retried, failed) counts
+    """
+    sent = retried = failed = 0
+    for entry in claim_batch(batch_size or settings.OUTBOX_BATCH_SIZE):
+        notification = Notification(entry.channel, entry.recipient, entry.subject, entry.body, entry.campaign_name)
+        entry.attempts += 1
+        if deliver(notification):
+            entry.status = 'sent'
+            entry.sent_at = timezone.now()
+            entry.last_error = ''
+            sent += 1
+        elif entry.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            entry.status = 'failed'
+            entry.last_error = f"Gave up after {entry.attempts} attempts."
+            failed += 1
+            logger.error(f"Outbox entry {entry.pk} ({entry.channel} to {entry.recipient}) failed permanently.")
+        else:
+            entry.next_attempt_at = timezone.now() + retry_delay(entry.attempts)
+            entry.last_error = f"Delivery attempt {entry.attempts} failed."
+            retried += 1
+        entry.save(update_fields=['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'])
+    return sent, retried, failed
+
+
+def purge_outbox(cutoff, batch_size):
+    """
+    Deletes sent and permanently failed outbox rows created before the cutoff,
+    one short transaction per batch of primary keys. Their bodies hold OTP
+    codes in plain text, so they are not kept longer than needed. Pending
+    rows are never deleted.
+
+    :param cutoff: Delete rows whose created_at is older than this
+    :param batch_size: Maximum number of rows deleted per statement
+    :return: Iterator of the number of rows deleted per batch
+    """
+    while True:
+        pks = list(
+            NotificationOutbox.objects.filter(status__in=['sent', 'failed'], created_at__lt=cutoff)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            return
+        deleted, _ = NotificationOutbox.objects.filter(pk__in=pks).delete()
+        yield deleted
+        if len(pks) < batch_size:
+            return
@@ -0,0 +1,161 @@
+# utils/otp_service.py
+
+import logging
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, DateTimeField, F, Q, Value, When
+from django.utils import timezone
+from rest_framework.exceptions import Throttled
+
+from .db import update_returning
+from .otp_store import get_otp_store
+
+logger = logging.getLogger('authuser')
+
+User = get_user_model()
+
+
+class ResendLimitReached(Throttled):
+    """
+    Raised when the user has used up MAX_RESEND_OTP_ATTEMPTS. Rendered by DRF
+    as a 429 with a Retry-After header when the end of the lock is known.
+    """
+
+    def __init__(self, locked_until=None):
+        if locked_until is None:
+            detail = "Resend OTP limit reached. Try again later."
+        else:
+            lock_time_remaining = (locked_until - timezone.now()).seconds // 60  # in minutes
+            detail = f"Resend OTP limit reached. Try again in {lock_time_remaining} minutes."
+        super().__init__(detail=detail)
+        if locked_until is not None:
+            self.wait = max(0, int((locked_until - timezone.now()).total_seconds()))
+
+
+class OTPVerificationError(Exception):
+    """
+    :param reason: 'missing', 'verified', 'expired', 'locked' or 'invalid'
+    :param field: The challenge field that did not match (reason 'invalid')
+    :param remaining_attempts: Attempts left after this one (reason 'invalid')
+    """
+
+    def __init__(self, reason, field=None, remaining_attempts=None):
+        super().__init__(reason)
+        self.reason = reason
+        self.field = field
+        self.remaining_attempts = remaining_attempts
+
+
+def claim_resend(user):
+    """
+    Counts one OTP send against the user's resend limit with a single
+    conditional UPDATE ... RETURNING, so concurrent requests cannot both take
+    the last attempt. Reaching MAX_RESEND_OTP_ATTEMPTS starts the lock; once
+    the lock has passed the count starts over.
+
+    A count at the limit without a lock (from before the lock existed, or a
+    lowered limit) is treated as a lock that has passed. Refusing it would
+    need a write that the caller's transaction rolls back with the refusal,
+    leaving the user refused forever; this way nothing is written when a
+    send is refused.
+
+    :raises ResendLimitReached: If the user is locked
+    """
+    now = timezone.now()
+    lock_until = now + timezone.timedelta(minutes=settings.RESEND_OTP_LOCK_DURATION_MINUTES)
+    max_attempts = settings.MAX_RESEND_OTP_ATTEMPTS
+    start_over = Q(otp_resend_locked_until__lte=now) | Q(
+        otp_resend_locked_until__isnull=True, resend_otp_attempts__gte=max_attempts
+    )
+
+    rows = update_returning(
+        User.objects.filter(pk=user.pk).filter(
+            Q(otp_resend_locked_until__isnull=True) | Q(otp_resend_locked_until__lte=now)
+        ),
+        ['resend_otp_attempts', 'otp_resend_locked_until'],
+        resend_otp_attempts=Case(
+            When(start_over, then=Value(1)),
+            default=F('resend_otp_attempts') + 1,
+        ),
+        otp_resend_locked_until=Case(
+            When(start_over, then=Value(lock_until if max_attempts <= 1 else None)),
+            When(resend_otp_attempts__gte=max_attempts - 1, then=Value(lock_until)),
+            default=Value(None),
+            output_field=DateTimeField(),
+        ),
+    )
+    if rows:
+        user.resend_otp_attempts = rows[0]['resend_otp_attempts']
+        user.otp_resend_locked_until = rows[0]['otp_resend_locked_until']
+        return
+
+    user.otp_resend_locked_until = User.objects.filter(pk=user.pk).values_list('otp_resend_locked_until', flat=True).first()
+    raise ResendLimitReached(user.otp_resend_locked_until)
+
+
+def issue_challenge(user, resend=True, defaults=None, **codes):
+    """
+    Issues new OTP codes for the user in one transaction.
+
+    :param resend: Count this send against the resend limit (claim_resend)
+                   and keep the codes of the current challenge not replaced
+    :param defaults: Codes to use where the current challenge has none
+    :param codes: New values for utils.otp_store.CHALLENGE_FIELDS
+    :raises ResendLimitReached: If resend is set and the user is out of attempts
+    :return: The new OTPChallenge
+    """
+    # No savepoint: callers inside notification_atomic() fail as a whole anyway
+    with transaction.atomic(savepoint=False):
+        if resend:
+            # Also locks the user row, so concurrent sends for a user are serialized
+            claim_resend(user)
+        return get_otp_store().issue(user, merge=resend, defaults=defaults, **codes)
+
+
+def lock_account(user):
+    """
+    Deactivates the account for LOGIN_LOCK_DURATION_HOURS.
+    """
+    user.lock_until = timezone.now() + timezone.timedelta(hours=settings.LOGIN_LOCK_DURATION_HOURS)
+    user.is_active = False
+    User.objects.filter(pk=user.pk).update(lock_until=user.lock_until, is_active=False)
+    logger.warning(f"Locked user {user.pk} after {settings.OTP_MAX_ATTEMPTS} failed OTP attempts.")
+
+
+def verify_challenge(user, **expected):
+    """
+    Checks submitted values against the user's active challenge and consumes
+    it. A wrong value counts one attempt; a challenge that has used up
+    OTP_MAX_ATTEMPTS locks the account.
+
+    :param expected: Challenge field -> submitted value, checked in order
+                     (e.g. email_otp='123456', or new_email and new_email_otp)
+    :raises OTPVerificationError: If the challenge cannot be verified
+    :return: The consumed OTPChallenge
+    """
+    otp_store = get_otp_store()
+    challenge = otp_store.get(user)
+    if challenge is None:
+        raise OTPVerificationError('missing')
+    if challenge.is_verified:
+        raise OTPVerificationError('verified')
+    if challenge.is_expired():
+        raise OTPVerificationError('expired')
+    if challenge.attempts >= settings.OTP_MAX_ATTEMPTS:
+        lock_account(user)
+        raise OTPVerificationError('locked')
+
+    for field, value in expected.items():
+        stored = getattr(challenge, field)
+        if stored is None or stored != value:
+            attempts = otp_store.record_failure(challenge)
+            raise OTPVerificationError(
+                'invalid', field=field, remaining_attempts=max(0, settings.OTP_MAX_ATTEMPTS - attempts)
+            )
+
+    if not otp_store.consume(challenge):
+        # A concurrent request verified it or used up its attempts first
+        raise OTPVerificationError('verified')
+    return challenge
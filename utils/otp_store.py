@@ -0,0 +1,229 @@
+# utils/otp_store.py
+
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .db import update_returning
+from .models import OTP
+
+logger = logging.getLogger('authuser')
+
+CHALLENGE_FIELDS = (
+    'email_otp',
+    'mobile_otp',
+    'new_email',
+    'new_email_otp',
+    'new_mobile',
+    'new_mobile_otp',
+)
+
+
+class OTPChallenge:
+    """
+    The active OTP challenge of a user: the codes last issued, how many
+    wrong guesses were made and when it expires. `id` is the audit row in
+    utils.models.OTP.
+    """
+
+    def __init__(self, id, user_id, expiry_time, is_verified=False, attempts=0, **codes):
+        self.id = id
+        self.user_id = user_id
+        self.expiry_time = expiry_time
+        self.is_verified = is_verified
+        self.attempts = attempts
+        for field in CHALLENGE_FIELDS:
+            setattr(self, field, codes.get(field))
+
+    def as_dict(self):
+        data = {field: getattr(self, field) for field in CHALLENGE_FIELDS}
+        data.update(id=self.id, user_id=self.user_id, expiry_time=self.expiry_time, is_verified=self.is_verified)
+        return data
+
+    def is_expired(self):
+        return self.expiry_time < timezone.now()
+
+
+class DatabaseOTPStore:
+    """
+    Keeps challenges in the OTP table; the active one is the user's latest row.
+    """
+
+    def write_audit(self, user, codes, expiry_time):
+        return OTP.objects.create(user=user, expiry_time=expiry_time, **codes)
+
+    def issue(self, user, merge=False, defaults=None, **codes):
+        """
+        Starts a new challenge for the user with a fresh expiry and attempt count.
+
+        :param merge: Carry over the codes of the current challenge that are
+                      not being replaced (e.g. resending only the email code)
+        :param defaults: Values for CHALLENGE_FIELDS that the current challenge
+                         does not have (or all of them, without one)
+        :param codes: New values for CHALLENGE_FIELDS
+        :return: The new OTPChallenge
+        """
+        current = {}
+        if merge:
+            challenge = self.get(user)
+            if challenge is not None:
+                current = {field: getattr(challenge, field) for field in CHALLENGE_FIELDS}
+                current = {field: value for field, value in current.items() if value is not None}
+        codes = {**(defaults or {}), **current, **codes}
+        expiry_time = timezone.now() + timezone.timedelta(minutes=settings.OTP_EXPIRY_MINUTES)
+        row = self.write_audit(user, codes, expiry_time)
+        return OTPChallenge(row.pk, user.pk, expiry_time, **codes)
+
+    def get(self, user):
+        """
+        Returns the user's latest challenge, or None.
+        """
+        row = OTP.objects.filter(user=user).order_by('-created_at').first()
+        if row is None:
+            return None
+        return OTPChallenge(
+            row.pk, row.user_id, row.expiry_time, is_verified=row.is_verified, attempts=row.attempts,
+            **{field: getattr(row, field) for field in CHALLENGE_FIELDS}
+        )
+
+    def record_failure(self, challenge):
+        """
+        Counts a wrong code against the challenge.
+
+        :return: The attempt count including this one
+        """
+        rows = update_returning(OTP.objects.filter(pk=challenge.id), ['attempts'], attempts=F('attempts') + 1)
+        challenge.attempts = rows[0]['attempts'] if rows else challenge.attempts + 1
+        return challenge.attempts
+
+    def consume(self, challenge):
+        """
+        Marks the challenge verified, unless a concurrent request already did,
+        used up its attempts or it expired in the meantime.
+
+        :return: True if this call verified the challenge
+        """
+        verified = OTP.objects.filter(
+            pk=challenge.id,
+            is_verified=False,
+            attempts__lt=settings.OTP_MAX_ATTEMPTS,
+            expiry_time__gt=timezone.now(),
+        ).update(is_verified=True)
+        challenge.is_verified = bool(verified)
+        return challenge.is_verified
+
+
+class CacheOTPStore(DatabaseOTPStore):
+    """
+    Serves the active challenge from the cache, stored with a TTL of
+    OTP_EXPIRY_MINUTES so expired challenges disappear on their own; the OTP
+    table is only written as an audit trail, by primary key.
+
+    The attempt counter is a separate key bumped with cache.incr(), which is
+    atomic on Redis and memcached. Use a cache shared by all workers: with
+    the local-memory backend each process sees only its own challenges.
+    """
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def challenge_key(self, user_id):
+        return f'otp:challenge:{user_id}'
+
+    def attempts_key(self, user_id):
+        return f'otp:attempts:{user_id}'
+
+    def timeout(self, challenge):
+        return max(1, int((challenge.expiry_time - timezone.now()).total_seconds()))
+
+    def issue(self, user, merge=False, defaults=None, **codes):
+        challenge = super().issue(user, merge=merge, defaults=defaults, **codes)
+        data = challenge.as_dict()
+
+        def publish():
+            timeout = self.timeout(challenge)
+            self.cache.set_many({
+                self.challenge_key(user.pk): data,
+                self.attempts_key(user.pk): 0,
+            }, timeout)
+
+        # Only publish codes whose audit row (and notification) actually committed
+        transaction.on_commit(publish)
+        return challenge
+
+    def get(self, user):
+        keys = (self.challenge_key(user.pk), self.attempts_key(user.pk))
+        found = self.cache.get_many(keys)
+        data = found.get(keys[0])
+        if data is None:
+            return None
+        return OTPChallenge(attempts=found.get(keys[1], 0), **data)
+
+    def record_failure(self, challenge):
+        try:
+            challenge.attempts = self.cache.incr(self.attempts_key(challenge.user_id))
+        except ValueError:
+            # The challenge expired between get() and now
+            challenge.attempts += 1
+        OTP.objects.filter(pk=challenge.id).update(attempts=challenge.attempts)
+        return challenge.attempts
+
+    def consume(self, challenge):
+        # The audit row is the arbiter between concurrent requests
+        if not super().consume(challenge):
+            return False
+        self.cache.set(self.challenge_key(challenge.user_id), challenge.as_dict(), self.timeout(challenge))
+        return True
+
+
+def purge_expired(cutoff, batch_size):
+    """
+    Deletes OTP rows that expired before the cutoff, one short transaction
+    per batch of primary keys so the table is never locked for long.
+    Verified rows go with their expiry: the active challenge is the user's
+    latest row, so deleting it early could revive an older, unexpired one.
+
+    :param cutoff: Delete rows whose expiry_time is older than this
+    :param batch_size: Maximum number of rows deleted per statement
+    :return: Iterator of the number of rows deleted per batch
+    """
+    while True:
+        pks = list(
+            OTP.objects.filter(expiry_time__lt=cutoff)
+            .order_by('expiry_time')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            return
+        deleted, _ = OTP.objects.filter(pk__in=pks).delete()
+        yield deleted
+        if len(pks) < batch_size:
+            return
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_otp_store():
+    """
+    Returns the process-wide store selected by settings.OTP_STORE.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if settings.OTP_STORE == 'cache':
+                    _store = CacheOTPStore(settings.OTP_CACHE_ALIAS)
+                else:
+                    _store = DatabaseOTPStore()
+    return _store
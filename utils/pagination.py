@@ -1,19 +1,223 @@
 # utils/pagination.py
 
+import base64
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.response import Response
 
 class KendoPagination(LimitOffsetPagination):
+    """
+    Kendo-style take/skip pagination.
+
+    Passing ?cursor= (empty for the first page, then the returned nextCursor)
+    switches to keyset pagination: pages are fetched with a WHERE on the
+    ordering key instead of OFFSET, and no COUNT(*) is run, so every page
+    costs the same as the first. The ordering is the one requested through
+    OrderingFilter, else the view's cursor_ordering, else the primary key;
+    the primary key is always appended as a tie-breaker.
+
+    In offset mode the 'total' is computed with the strategy named by the
+    view's pagination_total_strategy (default: KENDO_PAGINATION_TOTAL):
+
+    - 'exact': COUNT(*) on every request
+    - 'cached': COUNT(*) cached per (filtered query, view.get_total_cache_version())
+      for KENDO_PAGINATION_TOTAL_CACHE_SECONDS
+    - 'estimated': the planner's row estimate (pg_class.reltuples, or EXPLAIN
+      for filtered queries) once the table holds more than
+      KENDO_PAGINATION_ESTIMATE_THRESHOLD rows; exact below that or off Postgres
+
+    'totalExact' in the response says whether the total can be trusted exactly.
+    """
     default_limit = 10
     limit_query_param = 'take'
     offset_query_param = 'skip'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.view = view
+        self.total_exact = True
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        ordering = self.get_cursor_ordering(queryset, view)
+        queryset = queryset.order_by(*ordering)
+        loaded, deferred = queryset.query.deferred_loading
+        if loaded and not deferred:
+            # The cursor is read from the last row, so sparse fieldsets (.only()) must still load the ordering fields
+            ordering_fields = {field.lstrip('-') for field in ordering} - {'pk'} - set(queryset.query.annotations)
+            queryset = queryset.only(*loaded, *ordering_fields)
+
+        position = self.decode_cursor(request.query_params[self.cursor_query_param], ordering, queryset)
+        if position is not None:
+            queryset = queryset.filter(self.keyset_filter(ordering, position))
+
+        # Fetch one extra row to know whether there is a next page
+        rows = list(queryset[:self.limit + 1])
+        self.next_cursor = self.encode_cursor(ordering, rows[self.limit - 1]) if len(rows) > self.limit else None
+        return rows[:self.limit]
+
+    def get_count(self, queryset):
+        strategy = getattr(self.view, 'pagination_total_strategy', None) or settings.KENDO_PAGINATION_TOTAL
+        if strategy == 'cached':
+            return self.get_cached_count(queryset)
+        if strategy == 'estimated':
+            estimate = self.get_estimated_count(queryset)
+            if estimate is not None:
+                self.total_exact = False
+                return estimate
+        return super().get_count(queryset)
+
+    def get_cached_count(self, queryset):
+        get_version = getattr(self.view, 'get_total_cache_version', None)
+        version = get_version() if get_version else None
+        try:
+            # Ordering doesn't change the count, so all orderings share one entry
+            sql, params = queryset.order_by().query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        signature = hashlib.md5(repr((queryset.db, sql, params, version)).encode('utf-8')).hexdigest()
+        cache_key = f'kendo:total:{signature}'
+
+        count = cache.get(cache_key)
+        if count is None:
+            count = super().get_count(queryset)
+            cache.set(cache_key, count, settings.KENDO_PAGINATION_TOTAL_CACHE_SECONDS)
+        elif version is None:
+            # Without a table version the cached figure may be up to the TTL out of date
+            self.total_exact = False
+        return count
+
+    def get_estimated_count(self, queryset):
+        """
+        Returns the planner's row estimate for large Postgres tables, or None
+        when an exact count should be used instead.
+        """
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        # reltuples is -1 for tables that were never analyzed
+        if row is None or row[0] < settings.KENDO_PAGINATION_ESTIMATE_THRESHOLD:
+            return None
+        if not queryset.query.where:
+            return row[0]
+        plan = json.loads(queryset.explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    def get_cursor_ordering(self, queryset, view):
+        ordering = [field for field in queryset.query.order_by if isinstance(field, str)]
+        if not ordering:
+            ordering = list(getattr(view, 'cursor_ordering', None) or ['pk'])
+        if not any(field.lstrip('-') in ('pk', 'id') for field in ordering):
+            ordering.append('pk')
+        return ordering
+
+    def keyset_filter(self, ordering, position):
+        """
+        Builds (a > x) OR (a = x AND b > y) OR ... for the ordering fields,
+        using < for descending fields.
+        """
+        condition = Q()
+        for index, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            clause = Q(**{f'{name}__{lookup}': position[index]})
+            for previous, value in zip(ordering[:index], position[:index]):
+                clause &= Q(**{previous.lstrip('-'): value})
+            condition |= clause
+        return condition
+
+    def encode_cursor(self, ordering, instance):
+        values = []
+        for field in ordering:
+            if isinstance(instance, dict):
+                # values() rows are keyed by the lookup path
+                values.append(instance[field.lstrip('-')])
+                continue
+            value = instance
+            for attr in field.lstrip('-').split('__'):
+                value = getattr(value, attr)
+            values.append(value)
+        payload = json.dumps(values, cls=DjangoJSONEncoder).encode('utf-8')
+        return base64.urlsafe_b64encode(payload).decode('ascii')
+
+    def get_ordering_field(self, queryset, path):
+        """
+        Returns the model field an ordering path (e.g. 'state__name') ends on,
+        or the output field of an annotation (e.g. the search rank).
+        """
+        if path in queryset.query.annotations:
+            return queryset.query.annotations[path].output_field
+        model = queryset.model
+        parts = path.split('__')
+        for index, part in enumerate(parts):
+            field = model._meta.pk if part == 'pk' else model._meta.get_field(part)
+            if index < len(parts) - 1:
+                model = field.related_model
+        return field
+
+    def decode_cursor(self, cursor, ordering, queryset):
+        """
+        Decodes a cursor into one value per ordering field, converted with the
+        field's to_python() so a tampered cursor is rejected instead of
+        reaching the query.
+        """
+        if not cursor:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        except (ValueError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        position = []
+        for field, value in zip(ordering, values):
+            try:
+                value = self.get_ordering_field(queryset, field.lstrip('-')).to_python(value)
+            except (ValueError, TypeError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+            if value is None:
+                # NULL cannot be compared with < or >
+                raise NotFound(self.invalid_cursor_message)
+            position.append(value)
+        return position
 
     def get_paginated_response(self, data):
+        if self.cursor_mode:
+            return Response({
+                'take': self.limit,
+                'skip': None,
+                'page': None,
+                'pageSize': self.limit,
+                'total': None,
+                'totalExact': False,
+                'nextCursor': self.next_cursor,
+                'results': data
+            })
         return Response({
             'take': self.get_limit(self.request),
             'skip': self.get_offset(self.request),
             'page': (self.get_offset(self.request) // self.get_limit(self.request)) + 1,
             'pageSize': self.get_limit(self.request),
             'total': self.count,
+            'totalExact': self.total_exact,
             'results': data
         })
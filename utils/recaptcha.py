@@ -0,0 +1,82 @@
+# utils/recaptcha.py
+
+import hashlib
+import logging
+import threading
+import time
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+from .http import build_session
+
+# Initialize logger
+logger = logging.getLogger('authuser')  # Use the appropriate logger
+
+RECAPTCHA_VERIFY_URL = 'https://www.google.com/recaptcha/api/siteverify'
+VERDICT_CACHE_PREFIX = 'recaptcha:verdict:'
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class RecaptchaUnavailable(Exception):
+    """
+    Raised when Google's siteverify endpoint cannot be reached in time or
+    returns a response that cannot be parsed.
+    """
+
+
+def _get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session(pool_maxsize=settings.RECAPTCHA_POOL_SIZE)
+    return _session
+
+
+def _verdict_cache_key(token):
+    return VERDICT_CACHE_PREFIX + hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def verify_recaptcha(token):
+    """
+    Validates a Google reCAPTCHA v3 token.
+
+    Verdicts are cached for RECAPTCHA_VERDICT_CACHE_SECONDS, so a retried
+    submission of the same form does not re-verify the token (Google would
+    reject the second verification as a duplicate anyway).
+
+    :param token: The token posted by the client
+    :return: Boolean indicating if the token is valid
+    :raises RecaptchaUnavailable: If siteverify failed or timed out
+    """
+    cache_key = _verdict_cache_key(token)
+    verdict = cache.get(cache_key)
+    if verdict is not None:
+        metrics.increment('recaptcha.cache_hit')
+        return verdict
+
+    data = {
+        'secret': settings.GOOGLE_RECAPTCHA_SECRET_KEY,
+        'response': token
+    }
+    timeout = (settings.RECAPTCHA_CONNECT_TIMEOUT, settings.RECAPTCHA_READ_TIMEOUT)
+    started = time.monotonic()
+    try:
+        response = _get_session().post(RECAPTCHA_VERIFY_URL, data=data, timeout=timeout)
+        result = response.json()
+    except (requests.RequestException, ValueError) as e:
+        metrics.increment('recaptcha.error')
+        logger.error(f"reCAPTCHA verification failed: {str(e)}")
+        raise RecaptchaUnavailable(str(e)) from e
+    finally:
+        metrics.observe('recaptcha.latency', time.monotonic() - started)
+
+    verdict = bool(result.get('success', False))
+    metrics.increment('recaptcha.success' if verdict else 'recaptcha.rejected')
+    cache.set(cache_key, verdict, settings.RECAPTCHA_VERDICT_CACHE_SECONDS)
+    return verdict
@@ -1,5 +1,6 @@
 # utils/serializers.py
 
+from django.core.exceptions import FieldDoesNotExist
 from rest_framework import serializers
 from .models import OTP
 
@@ -7,3 +8,55 @@ class OTPCustomSerializer(serializers.ModelSerializer):
     class Meta:
         model = OTP
         fields = '__all__'
+
+
+def parse_field_list(value):
+    return {name.strip() for name in value.split(',') if name.strip()} if value else set()
+
+
+class SparseFieldsetMixin:
+    """
+    Lets clients trim the response with ?fields=a,b (keep only these) and/or
+    ?omit=c (drop these) on GET requests. Unknown names are ignored.
+
+    Only the top-level serializer (or the child of a top-level list) is
+    trimmed, so nested representations stay complete.
+    """
+    fields_query_param = 'fields'
+    omit_query_param = 'omit'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET' or not self.is_root():
+            return
+        keep = parse_field_list(request.query_params.get(self.fields_query_param))
+        omit = parse_field_list(request.query_params.get(self.omit_query_param))
+        for name in list(self.fields):
+            if (keep and name not in keep) or name in omit:
+                self.fields.pop(name)
+
+    def is_root(self):
+        parent = self.parent
+        return parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None)
+
+    def get_model_columns(self):
+        """
+        Model fields the remaining serializer fields read, for QuerySet.only(),
+        or None if some field's source cannot be mapped to a model field.
+        """
+        model = self.Meta.model
+        columns = []
+        for field in self.fields.values():
+            if field.write_only:
+                continue
+            if field.source == '*':
+                return None
+            try:
+                model_field = model._meta.get_field(field.source.split('.')[0])
+            except FieldDoesNotExist:
+                return None
+            if not model_field.concrete:
+                return None
+            columns.append(model_field.name)
+        return columns
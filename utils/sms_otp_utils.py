@@ -1,22 +1,87 @@
 # utils/sms_otp_utils.py
 
+import random
+import threading
+import time
+
 import requests
 import logging
 from django.conf import settings
 
+from . import metrics
+from .circuit_breaker import CircuitBreaker
+from .http import build_session
+
 # Initialize logger
 logger = logging.getLogger('authuser')  # Use the appropriate logger
 
+SMS_API_URL = "https://backend.aisensy.com/campaign/t1/api/v2"
+
+# Status codes that mean the provider did not act on the request, so a retry cannot send a duplicate SMS.
+# 502/504 are not among them: a gateway error says nothing about whether the provider already sent it
+RETRYABLE_STATUS_CODES = {429, 503}
+
+_session = None
+_session_lock = threading.Lock()
+
+circuit_breaker = CircuitBreaker(
+    'sms',
+    failure_threshold=settings.SMS_CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=settings.SMS_CIRCUIT_RESET_SECONDS,
+)
+
+
+def _get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session(
+                    pool_maxsize=settings.SMS_POOL_SIZE,
+                    headers={"Content-Type": "application/json"},
+                )
+    return _session
+
+
+def _post_with_retries(payload):
+    """
+    Posts the campaign payload, retrying only failures where the provider
+    cannot have sent the SMS yet: connection errors, connect timeouts and
+    RETRYABLE_STATUS_CODES. Read timeouts are not retried, since the SMS may
+    already be on its way.
+
+    :return: The final requests Response
+    :raises requests.RequestException: If every attempt failed at the transport level
+    """
+    timeout = (settings.SMS_CONNECT_TIMEOUT, settings.SMS_READ_TIMEOUT)
+    for attempt in range(settings.SMS_MAX_RETRIES + 1):
+        if attempt:
+            metrics.increment('sms.retry')
+            # Full jitter keeps retries from many workers from synchronising
+            time.sleep(random.uniform(0, settings.SMS_RETRY_BACKOFF_SECONDS * (2 ** (attempt - 1))))
+        try:
+            response = _get_session().post(SMS_API_URL, json=payload, timeout=timeout)
+        except (requests.ConnectionError, requests.ConnectTimeout):
+            if attempt == settings.SMS_MAX_RETRIES:
+                raise
+            continue
+        if response.status_code not in RETRYABLE_STATUS_CODES or attempt == settings.SMS_MAX_RETRIES:
+            return response
+
+
 def send_otp_sms(destination, otp_code, campaign_name="otp_verification"):
     """
     Sends an SMS using the provided API.
 
+    Calls go through a pooled session with bounded timeouts and jittered
+    retries, guarded by a circuit breaker that fails fast while the provider
+    is down.
+
     :param destination: The recipient's mobile number with country code (e.g., +919662278990)
     :param otp_code: The OTP code to send
     :param campaign_name: The campaign name for the SMS (default: "otp_verification")
     :return: Boolean indicating if the SMS was sent successfully
     """
-    url = "https://backend.aisensy.com/campaign/t1/api/v2"
     payload = {
         "apiKey": settings.SMS_API_KEY,
         "campaignName": campaign_name,
@@ -41,18 +106,33 @@ def send_otp_sms(destination, otp_code, campaign_name="otp_verification"):
         ]
     }
 
-    headers = {
-        "Content-Type": "application/json"
-    }
+    if not circuit_breaker.allow_request():
+        metrics.increment('sms.short_circuited')
+        logger.error(f"SMS provider circuit is open; not sending SMS to {destination}.")
+        return False
 
+    started = time.monotonic()
     try:
-        response = requests.post(url, json=payload, headers=headers)
-        if response.status_code == 200:
-            logger.info(f"SMS sent successfully to {destination} with OTP {otp_code}.")
-            return True
-        else:
-            logger.error(f"Failed to send SMS to {destination}. Status Code: {response.status_code}, Response: {response.text}")
-            return False
+        response = _post_with_retries(payload)
     except Exception as e:
+        circuit_breaker.record_failure()
+        metrics.increment('sms.error')
         logger.error(f"Exception occurred while sending SMS to {destination}: {str(e)}", exc_info=True)
         return False
+    finally:
+        metrics.observe('sms.latency', time.monotonic() - started)
+
+    if response.status_code == 200:
+        circuit_breaker.record_success()
+        metrics.increment('sms.sent')
+        logger.info(f"SMS sent successfully to {destination} with OTP {otp_code}.")
+        return True
+
+    # 4xx other than 429 means the request itself is wrong, not that the provider is down
+    if response.status_code >= 500 or response.status_code == 429:
+        circuit_breaker.record_failure()
+    else:
+        circuit_breaker.record_success()
+    metrics.increment('sms.failed')
+    logger.error(f"Failed to send SMS to {destination}. Status Code: {response.status_code}, Response: {response.text}")
+    return False
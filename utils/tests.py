@@ -0,0 +1,72 @@
+# utils/tests.py
+
+import hashlib
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from authuser.models import User
+from .throttling import AuthThrottle, IdentifierThrottle, IPThrottle
+
+
+class LoginView:
+    throttle_scope = 'login'
+
+
+class ThrottleTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='user@example.com', password='Passw0rd!', user_type='student')
+
+    def request(self, data, user=None, **extra):
+        request = Request(APIRequestFactory().post('/', data, format='json', **extra), parsers=[JSONParser()])
+        request.user = user or AnonymousUser()
+        return request
+
+    def test_forwarded_for_is_not_trusted(self):
+        for forwarded in ('203.0.113.1', '203.0.113.2, 10.0.0.1'):
+            with self.subTest(forwarded=forwarded):
+                request = self.request({}, REMOTE_ADDR='10.0.0.9', HTTP_X_FORWARDED_FOR=forwarded)
+                self.assertEqual(IPThrottle().get_ident_for(request, LoginView()), '10.0.0.9')
+
+    def test_forged_forwarded_for_is_throttled(self):
+        codes = []
+        for index in range(25):
+            response = self.client.post(
+                '/api/authuser/login/',
+                {'identifier': f'nobody{index}@example.com', 'password': 'wrong'},
+                content_type='application/json',
+                HTTP_X_FORWARDED_FOR=f'203.0.113.{index}',
+            )
+            codes.append(response.status_code)
+        # login_ip is 20/min
+        self.assertEqual(codes.count(429), 5)
+
+    def test_identifier_key(self):
+        throttle = IdentifierThrottle()
+        cases = [
+            ({'identifier': ' User@Example.com '}, None, hashlib.md5(b'user@example.com').hexdigest()),
+            ([{'identifier': 'user@example.com'}], None, None),
+            ({}, None, None),
+            # Authenticated requests cannot swap their own key for another identifier
+            ({'identifier': 'other@example.com'}, self.user, f'user:{self.user.pk}'),
+            ({'new_email': 'New@Example.com'}, self.user, hashlib.md5(b'new@example.com').hexdigest()),
+        ]
+        for data, user, expected in cases:
+            with self.subTest(data=data, user=user):
+                self.assertEqual(throttle.get_ident_for(self.request(data, user), LoginView()), expected)
+
+    def test_refused_requests_are_not_counted(self):
+        # login_identifier is 10/min, login_ip 20/min: requests refused by the
+        # identifier limit must not use up the address's budget
+        allowed = [AuthThrottle().allow_request(self.request({'identifier': 'a@example.com'}), LoginView())
+                   for index in range(30)]
+        self.assertEqual(allowed.count(True), 10)
+        allowed = [AuthThrottle().allow_request(self.request({'identifier': f'{index}@example.com'}), LoginView())
+                   for index in range(15)]
+        self.assertEqual(allowed.count(True), 10)
@@ -0,0 +1,188 @@
+# utils/throttling.py
+
+import hashlib
+from collections.abc import Mapping
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle, SimpleRateThrottle
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Sliding-window counter limiter.
+
+    SimpleRateThrottle keeps a list of request timestamps per key and rewrites
+    it on every request. Here each key is two fixed-window counters, the
+    current and the previous window, bumped with cache.incr(), which is atomic
+    on Redis and memcached. The rate in the sliding window is estimated as
+    previous * (share of the previous window still covered) + current.
+
+    Rates come from DEFAULT_THROTTLE_RATES under '<view.throttle_scope>_<kind>'.
+    Views without a throttle_scope, or scopes without a rate, are not limited.
+    Rejected requests are not counted, so clients regain access as the window
+    slides instead of being locked out by their own retries.
+
+    allow_request() checks and records in one go; check() and record() are
+    separate so that CombinedThrottle can record only once every limit allows.
+    """
+    kind = None
+
+    def __init__(self):
+        # The rate depends on the view, so it is resolved in check()
+        self.current_key = None
+
+    def allow_request(self, request, view):
+        if not self.check(request, view):
+            return self.throttle_failure()
+        self.record()
+        return True
+
+    def check(self, request, view):
+        """
+        Returns whether the request is within the limit, without counting it.
+        """
+        self.current_key = None
+        scope = getattr(view, 'throttle_scope', None)
+        if not scope:
+            return True
+        self.scope = f'{scope}_{self.kind}'
+        self.rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        ident = self.get_ident_for(request, view)
+        if ident is None:
+            return True
+        self.key = self.cache_format % {'scope': self.scope, 'ident': ident}
+
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        self.elapsed = self.now - window * self.duration
+        current_key = f'{self.key}:{window}'
+        previous_key = f'{self.key}:{window - 1}'
+        counts = self.cache.get_many([previous_key, current_key])
+        self.previous = counts.get(previous_key, 0)
+        self.current = counts.get(current_key, 0)
+
+        if self.estimate() >= self.num_requests:
+            return False
+        self.current_key = current_key
+        return True
+
+    def record(self):
+        """
+        Counts the request checked last, if check() allowed it under a limit.
+        """
+        if self.current_key is None:
+            return
+        # Keep each window long enough to serve as the previous one
+        self.cache.add(self.current_key, 0, self.duration * 2)
+        try:
+            self.cache.incr(self.current_key)
+        except ValueError:
+            self.cache.set(self.current_key, 1, self.duration * 2)
+
+    def estimate(self):
+        overlap = (self.duration - self.elapsed) / self.duration
+        return self.previous * overlap + self.current
+
+    def get_ident_for(self, request, view):
+        """
+        Returns the identity to count against, or None to skip this throttle.
+        """
+        raise NotImplementedError
+
+    def wait(self):
+        """
+        Seconds until the estimate drops below the limit, assuming no more requests.
+        """
+        limit = self.num_requests
+        if self.current < limit:
+            # Within this window, once enough of the previous one has slid out
+            needed = 1 - (limit - self.current) / self.previous
+            return max(0.0, needed * self.duration - self.elapsed)
+        # In the next window, once enough of this one has slid out
+        needed = 1 - limit / self.current
+        return (self.duration - self.elapsed) + needed * self.duration
+
+
+class IPThrottle(SlidingWindowThrottle):
+    """
+    Limits each client address per endpoint. The address is REMOTE_ADDR
+    unless REST_FRAMEWORK['NUM_PROXIES'] says how many X-Forwarded-For
+    entries were added by trusted proxies.
+    """
+    kind = 'ip'
+
+    def get_ident_for(self, request, view):
+        return self.get_ident(request)
+
+
+class IdentifierThrottle(SlidingWindowThrottle):
+    """
+    Limits each account per endpoint, whichever address the requests come
+    from.
+
+    Anonymous requests are counted against the first identifier field in the
+    request body. Authenticated requests are counted against the address
+    they send a code to (new_email/new_mobile), so it cannot be flooded from
+    several accounts, and otherwise against the user; any other identifier
+    they post is ignored, so it cannot be varied to get around the limit.
+    """
+    kind = 'identifier'
+    identifier_fields = ('identifier', 'email', 'mobile')
+    target_fields = ('new_email', 'new_mobile')
+
+    def get_ident_for(self, request, view):
+        user = getattr(request, 'user', None)
+        authenticated = user is not None and user.is_authenticated
+        value = self.get_posted(request, self.target_fields if authenticated else self.identifier_fields)
+        if value is not None:
+            # Keep keys short and free of characters memcached rejects
+            return hashlib.md5(value.encode('utf-8')).hexdigest()
+        if authenticated:
+            return f'user:{user.pk}'
+        return None
+
+    def get_posted(self, request, fields):
+        """
+        Returns the first of the fields posted as a non-blank string, normalized.
+        """
+        data = request.data
+        if not isinstance(data, Mapping):
+            return None
+        for field in fields:
+            value = data.get(field)
+            if isinstance(value, str) and value.strip():
+                return value.strip().lower()
+        return None
+
+
+class CombinedThrottle(BaseThrottle):
+    """
+    Applies several sliding-window throttles as one. A request is counted
+    against all of them only when all of them allow it: DRF runs throttles
+    one by one, so with separate throttle_classes a request refused by one
+    limit would still use up the others.
+    """
+    throttle_classes = ()
+
+    def allow_request(self, request, view):
+        throttles = [throttle_class() for throttle_class in self.throttle_classes]
+        self.refused = [throttle for throttle in throttles if not throttle.check(request, view)]
+        if self.refused:
+            return False
+        for throttle in throttles:
+            throttle.record()
+        return True
+
+    def wait(self):
+        return max(throttle.wait() for throttle in self.refused)
+
+
+class AuthThrottle(CombinedThrottle):
+    throttle_classes = (IPThrottle, IdentifierThrottle)
+
+
+AUTH_THROTTLES = [AuthThrottle]
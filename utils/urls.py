@@ -2,11 +2,12 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import OTPViewSet
+from .views import OTPViewSet, MetricsView
 
 router = DefaultRouter()
 router.register(r'otps', OTPViewSet, basename='otp')
 
 urlpatterns = [
+    path('metrics/', MetricsView.as_view(), name='metrics'),
     path('', include(router.urls)),
 ]
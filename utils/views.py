@@ -1,11 +1,27 @@
 # utils/views.py
 
 from rest_framework import viewsets
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from .models import OTP
 from .serializers import OTPCustomSerializer
 from rest_framework.permissions import IsAdminUser
+from . import metrics
+from .sms_otp_utils import circuit_breaker as sms_circuit_breaker
 
 class OTPViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = OTP.objects.all()
     serializer_class = OTPCustomSerializer
     permission_classes = [IsAdminUser]
+    pagination_total_strategy = 'estimated'
+
+class MetricsView(APIView):
+    """
+    Exposes this worker's provider counters and timings for scraping.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        data = metrics.snapshot()
+        data['circuits'] = {sms_circuit_breaker.name: sms_circuit_breaker.state}
+        return Response(data)